@@ -0,0 +1,189 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import connection
+import db
+import parametric
+import queries
+import records
+
+# Bounds accepted by the parametric lookups, ``{column: (low, high)}``
+Filters = Optional[Dict[str, Tuple[Optional[float], Optional[float]]]]
+
+
+class AsyncQueries:
+    """
+    An asyncio facade over ``queries`` that never blocks the event loop.
+
+    Every call runs on a bounded thread pool whose threads read through their
+    own pool of read-only connections (``mode=ro``), so async readers never take
+    write locks or run DDL. The file must already be migrated to the current
+    schema (``db.SchemaOutdatedError`` otherwise). At most ``max_pending`` calls are queued or running
+    at once; further callers wait on a semaphore, which gives backpressure when
+    the pool is saturated.
+
+    Searches, keyset listings and the parametric lookups have coroutine
+    methods of their own; any other public ``queries.get_*`` function and the
+    ``parametric.find_*``/``nearest_*`` helpers are available as coroutines with
+    the same name and arguments, e.g. ``await aq.nearest_resistors(68_000)``.
+
+    Example:
+        async with AsyncQueries(workers=4) as aq:
+            bom = await aq.get_all_parts_by_amp('Vibro-Champ')
+
+    Args:
+        workers (int): Threads, and read-only connections, serving queries.
+        max_pending (int): Calls allowed in flight before callers have to wait; defaults to twice ``workers``.
+        path (str): Database file; defaults to the shared pool's path.
+        snapshot (bool): Read from an in-memory copy of the file instead (see ``connection.SnapshotPool``).
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: Optional[int] = None,
+        path: Optional[str] = None,
+        snapshot: bool = False,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending or workers * 2
+        path = path or connection.get_pool().path
+        # Readers can't migrate: fail here, not on the first query, if the file is missing or outdated
+        db.open_database(path, readonly=True).close()
+        if snapshot:
+            self._readers = connection.SnapshotPool(path, size=workers)
+        else:
+            self._readers = connection.ConnectionPool(path, size=workers, readonly=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='amps-db-reader',
+            initializer=connection.bind_thread,
+            initargs=(self._readers,),
+        )
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """
+        Runs a blocking function on a reader thread once a slot is free.
+        """
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+
+    def __getattr__(self, name: str):
+        if name.startswith('get_'):
+            func = getattr(queries, name, None)
+        elif name.startswith(('find_', 'nearest_')):
+            func = getattr(parametric, name, None)
+        else:
+            func = None
+        if func is None:
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = func.__doc__
+        return call
+
+    async def search_parts(self, term: str, limit: int = 20) -> List[records.SearchHit]:
+        return await self.run(queries.search_parts, term, limit)
+
+    async def get_parts_page(
+        self,
+        table: str,
+        brand_name: Optional[str] = None,
+        after_id: int = 0,
+        limit: int = 100,
+    ) -> Dict:
+        return await self.run(queries.get_parts_page, table, brand_name, after_id, limit)
+
+    async def iter_parts(
+        self,
+        table: str,
+        brand_name: Optional[str] = None,
+        after_id: int = 0,
+        batch_size: int = queries.BATCH_SIZE,
+    ) -> AsyncIterator[records.Record]:
+        """
+        Yields the parts of a table in id order, reading one keyset page per call.
+
+        Unlike ``queries.iter_parts`` no connection is held between pages, so a slow
+        consumer never pins a reader; pages may come from different database states
+        if an import commits midway.
+        """
+        while after_id is not None:
+            page = await self.get_parts_page(table, brand_name, after_id, batch_size)
+            for part in page['items']:
+                yield part
+            after_id = page['next_after_id']
+
+    async def find_in_range(
+        self,
+        table: str,
+        column: str,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        filters: Filters = None,
+        limit: Optional[int] = None,
+    ) -> List[records.Record]:
+        return await self.run(parametric.find_in_range, table, column, low, high, filters, limit)
+
+    async def find_within_tolerance(
+        self,
+        table: str,
+        column: str,
+        value: float,
+        tolerance: float = 0.05,
+        filters: Filters = None,
+        limit: Optional[int] = None,
+    ) -> List[records.Record]:
+        return await self.run(parametric.find_within_tolerance, table, column, value, tolerance, filters, limit)
+
+    async def find_nearest(
+        self,
+        table: str,
+        column: str,
+        value: float,
+        k: int = 10,
+        filters: Filters = None,
+    ) -> List[records.Record]:
+        return await self.run(parametric.find_nearest, table, column, value, k, filters)
+
+    async def get_all_parts_by_amp(self, amp_name: str) -> Dict[str, List[records.Record]]:
+        """
+        Fetches the five part categories of an amp concurrently.
+
+        Each category is read on its own connection, so unlike ``get_amp_bom`` the
+        lists may come from different database states if an import commits midway.
+        """
+        resistors, capacitors, pots, tubes, transformers = await asyncio.gather(
+            self.run(queries.get_all_resistors_by_amp, amp_name),
+            self.run(queries.get_all_capacitors_by_amp, amp_name),
+            self.run(queries.get_all_pots_by_amp, amp_name),
+            self.run(queries.get_all_tubes_by_amp, amp_name),
+            self.run(queries.get_all_transformers_by_amp, amp_name),
+        )
+        return {
+            'resistors': resistors,
+            'capacitors': capacitors,
+            'pots': pots,
+            'tubes': tubes,
+            'transformers': transformers,
+        }
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+        self._readers.close()
+
+    async def __aenter__(self) -> 'AsyncQueries':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cache
+import connection
+import importer
+import instrument
+import parametric
+import queries
+import synth
+
+# Fractional slowdown (or throughput drop) beyond which a metric counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+# Latencies below this many milliseconds are too noisy to flag
+NOISE_FLOOR_MS = 0.05
+
+# Run settings that must match a baseline for its timings to be comparable
+COMPARABLE_META = ('seed', 'amps', 'parts', 'snapshot')
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'calls': len(samples),
+        'p50_ms': instrument.percentile_ms(samples, 50, 4),
+        'p90_ms': instrument.percentile_ms(samples, 90, 4),
+        'p99_ms': instrument.percentile_ms(samples, 99, 4),
+        'max_ms': round(samples[-1] * 1000, 4),
+    }
+
+
+def _catalog_sample(rng: random.Random) -> Dict[str, List]:
+    with connection.connection() as conn:
+        amps = [row[0] for row in conn.execute('SELECT amp FROM amps')]
+        brands = [row[0] for row in conn.execute('SELECT brand FROM brands')]
+        tubes = [row[0] for row in conn.execute('SELECT DISTINCT name FROM tubes')]
+    return {
+        'amps': amps or ['none'],
+        'brands': brands or ['none'],
+        'terms': [name[:3] for name in tubes] + [amp[:4] for amp in rng.sample(amps, min(len(amps), 5))] or ['none'],
+    }
+
+
+def benchmarks(sample: Dict[str, List]) -> List[Tuple[str, Callable[[random.Random], tuple], Callable, int]]:
+    """
+    Every public query, as (name, argument maker, function, relative weight).
+
+    Brand-wide listings touch a large share of the catalog, so they run with a
+    tenth of the iterations (weight 10).
+    """
+    amp = lambda rng: (rng.choice(sample['amps']),)
+    brand = lambda rng: (rng.choice(sample['brands']),)
+    return [
+        ('get_all_brands', lambda rng: (), queries.get_all_brands, 1),
+        ('get_all_amps', lambda rng: (), queries.get_all_amps, 1),
+        ('get_all_resistors_by_amp_grouped', amp, queries.get_all_resistors_by_amp_grouped, 1),
+        ('get_all_resistors_by_amp', amp, queries.get_all_resistors_by_amp, 1),
+        ('get_all_capacitors_by_amp_grouped', amp, queries.get_all_capacitors_by_amp_grouped, 1),
+        ('get_all_capacitors_by_amp', amp, queries.get_all_capacitors_by_amp, 1),
+        ('get_all_pots_by_amp', amp, queries.get_all_pots_by_amp, 1),
+        ('get_all_tubes_by_amp', amp, queries.get_all_tubes_by_amp, 1),
+        ('get_all_transformers_by_amp', amp, queries.get_all_transformers_by_amp, 1),
+        ('get_amp_bom', amp, queries.get_amp_bom, 1),
+        ('get_all_parts_by_amp', amp, queries.get_all_parts_by_amp, 1),
+        ('get_transformers_by_amps', lambda rng: (tuple(rng.sample(sample['amps'], min(20, len(sample['amps'])))),),
+         queries.get_transformers_by_amps, 1),
+        ('get_consolidated_bom', lambda rng: ({name: rng.randint(1, 50) for name in rng.sample(sample['amps'], min(40, len(sample['amps'])))},),
+         queries.get_consolidated_bom, 1),
+        ('get_resistors_page', lambda rng: (rng.choice(sample['brands']), 0, 100), queries.get_resistors_page, 1),
+        ('get_capacitors_page', lambda rng: (rng.choice(sample['brands']), 0, 100), queries.get_capacitors_page, 1),
+        ('get_pots_page', lambda rng: (rng.choice(sample['brands']), 0, 100), queries.get_pots_page, 1),
+        ('search_parts', lambda rng: (rng.choice(sample['terms']),), queries.search_parts, 1),
+        ('find_resistors_near', lambda rng: (rng.choice((100, 1_500, 47_000, 68_000, 1_000_000)),),
+         parametric.find_resistors_near, 1),
+        ('nearest_capacitors', lambda rng: (rng.choice((0.001, 0.022, 0.1, 22, 100)), 10),
+         parametric.nearest_capacitors, 1),
+        ('get_all_resistors_by_brand', brand, queries.get_all_resistors_by_brand, 10),
+        ('get_all_capacitors_by_brand', brand, queries.get_all_capacitors_by_brand, 10),
+        ('get_all_pots_by_brand', brand, queries.get_all_pots_by_brand, 10),
+        ('get_all_parts_by_brand', brand, queries.get_all_parts_by_brand, 10),
+    ]
+
+
+def bench_queries(iterations: int = 50, seed: int = 0, only: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    Times every public query with cold and warm result caches.
+
+    Cold calls clear the result cache first, so they measure SQLite and row
+    building (the OS page cache stays warm). Warm calls repeat the same
+    arguments and measure cache hits.
+    """
+    rng = random.Random(seed)
+    sample = _catalog_sample(rng)
+    results = {}
+
+    for name, make_args, func, weight in benchmarks(sample):
+        if only and name not in only:
+            continue
+        runs = max(3, iterations // weight)
+        cold, warm = [], []
+        for _ in range(runs):
+            args = make_args(rng)
+            cache.invalidate()
+            started = time.perf_counter()
+            func(*args)
+            cold.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            func(*args)
+            warm.append(time.perf_counter() - started)
+        results[name] = {'cold': _percentiles(cold), 'warm': _percentiles(warm)}
+        print(f"{name:<36} cold p50 {results[name]['cold']['p50_ms']:>9.3f}ms  p99 {results[name]['cold']['p99_ms']:>9.3f}ms"
+              f"   warm p50 {results[name]['warm']['p50_ms']:>8.4f}ms", file=sys.stderr)
+    return results
+
+
+def bench_import(
+    base_url: str,
+    db_path: str,
+    workers: Optional[int] = None,
+    overwrite: bool = False,
+) -> Dict[str, Dict]:
+    """
+    Times a first load into an empty database, then a no-op incremental import.
+
+    An existing ``db_path`` is deleted first only when ``overwrite`` is set.
+    """
+    if os.path.exists(db_path) and not overwrite:
+        raise FileExistsError(f'{db_path} exists; pass overwrite=True to rebuild it')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    full = importer.import_tree(base_url, db_path=db_path, workers=workers)
+    started = time.perf_counter()
+    importer.import_tree(base_url, db_path=db_path, workers=workers)
+    noop_seconds = time.perf_counter() - started
+
+    return {
+        'full': {key: full[key] for key in ('files', 'rows', 'seconds', 'rows_per_sec')},
+        'noop': {'seconds': noop_seconds},
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Lists metrics that got worse than ``baseline`` by more than ``threshold``.
+
+    Queries are judged on their median; tail percentiles over a few dozen
+    calls are too noisy to gate on and are kept in the results for reading.
+
+    Raises:
+        ValueError: The baseline ran with a different seed, catalog or read mode.
+    """
+    mismatched = [
+        f"{key} {results['meta'].get(key)!r} vs {baseline.get('meta', {}).get(key)!r}"
+        for key in COMPARABLE_META
+        if results['meta'].get(key) != baseline.get('meta', {}).get(key)
+    ]
+    if mismatched:
+        raise ValueError('baseline ran with different settings: ' + ', '.join(mismatched))
+
+    regressions = []
+
+    def check(label: str, current: float, previous: float, higher_is_better: bool = False) -> None:
+        if previous is None or current is None or previous <= 0:
+            return
+        if higher_is_better:
+            if current < previous * (1 - threshold):
+                regressions.append(f'{label}: {current:,.0f} vs {previous:,.0f} ({current / previous - 1:+.0%})')
+        elif current > previous * (1 + threshold) and current - previous > NOISE_FLOOR_MS:
+            regressions.append(f'{label}: {current:.3f}ms vs {previous:.3f}ms ({current / previous - 1:+.0%})')
+
+    current_import, baseline_import = results.get('import'), baseline.get('import')
+    if current_import and baseline_import:
+        check('import rows/sec', current_import['full']['rows_per_sec'], baseline_import['full']['rows_per_sec'], True)
+        check('no-op import', current_import['noop']['seconds'] * 1000, baseline_import['noop']['seconds'] * 1000)
+
+    for name, timings in results.get('queries', {}).items():
+        previous = baseline.get('queries', {}).get(name)
+        if not previous:
+            continue
+        for mode in ('cold', 'warm'):
+            check(f'{name} {mode} p50', timings[mode]['p50_ms'], previous[mode]['p50_ms'])
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark imports and every public query.')
+    parser.add_argument('--parts', default=None, help='parts/ tree to import (default: a generated one)')
+    parser.add_argument('--db', default=None, help='database to build (default: a temporary file)')
+    parser.add_argument('--overwrite', action='store_true', help='let the import replace an existing --db')
+    parser.add_argument('--amps', type=int, default=500, help='amps in the generated tree')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=50, help='calls per query and cache state')
+    parser.add_argument('--workers', type=int, default=None, help='import parsing processes')
+    parser.add_argument('--only', nargs='*', default=None, help='query names to run')
+    parser.add_argument('--skip-import', action='store_true', help='benchmark queries on an existing --db')
+    parser.add_argument('--snapshot', action='store_true', help='read from an in-memory copy of the database')
+    parser.add_argument('--output', default='bench_results.json', help='where to write the results')
+    parser.add_argument('--baseline', default=None, help='earlier results to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.skip_import and not (args.db and os.path.exists(args.db)):
+        parser.error('--skip-import benchmarks an existing catalog; pass its path with --db')
+    if args.db and not args.skip_import and os.path.exists(args.db) and not args.overwrite:
+        parser.error(f'{args.db} exists; pass --overwrite to rebuild it or --skip-import to reuse it')
+
+    workdir = tempfile.mkdtemp(prefix='amps-bench-')
+    try:
+        return _run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run(args: argparse.Namespace, workdir: str) -> int:
+    db_path = args.db or os.path.join(workdir, 'amp_parts.db')
+    results = {
+        'meta': {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'amps': args.amps if args.parts is None else None,
+            'parts': args.parts,
+            'seed': args.seed,
+            'iterations': args.iterations,
+            'snapshot': args.snapshot,
+        },
+    }
+
+    if not args.skip_import:
+        base_url = args.parts
+        if base_url is None:
+            base_url = os.path.join(workdir, 'parts')
+            results['meta']['catalog'] = synth.generate(base_url, seed=args.seed, amps=args.amps)
+        results['import'] = bench_import(base_url, db_path, args.workers, overwrite=True)
+
+    connection.configure(path=db_path, snapshot=args.snapshot)
+    try:
+        results['queries'] = bench_queries(args.iterations, args.seed, args.only)
+    finally:
+        cache.get_cache().close()
+        connection.get_pool().close()
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f'Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        try:
+            regressions = compare(results, baseline, args.threshold)
+        except ValueError as e:
+            print(f'Cannot compare against {args.baseline}: {e}', file=sys.stderr)
+            return 1
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+        print(f'No regressions beyond {args.threshold:.0%} against {args.baseline}')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import functools
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import connection
+import db
+
+# Default seconds between data_version checks, see ResultCache
+CHECK_INTERVAL = 0.1
+
+
+class _PoolCache:
+    """
+    The cached results of one pool, with the connection watching its file's ``data_version``.
+    """
+
+    def __init__(self):
+        self.entries: OrderedDict = OrderedDict()
+        self.generation: Optional[Tuple] = None
+        self.watch_lock = threading.Lock()
+        self.watcher: Optional[sqlite3.Connection] = None
+        # (watched path and pool generation, data_version, checked at), replaced as a whole
+        self.watched: Optional[Tuple] = None
+
+    def close(self) -> None:
+        self.entries.clear()
+        with self.watch_lock:
+            if self.watcher is not None:
+                self.watcher.close()
+            self.watcher = None
+            self.watched = None
+
+
+class ResultCache:
+    """
+    A bounded LRU cache of query results, keyed on function, arguments and database generation.
+
+    The generation pairs an in-process import counter (bumped by ``invalidate``)
+    with ``PRAGMA data_version`` read from a dedicated connection, which changes
+    whenever any other connection or process commits to the file, and with the
+    generation of the pool being read, which moves when a
+    ``connection.SnapshotPool`` swaps in a new in-memory copy. When the
+    generation moves on, the entries are dropped, so a result computed before a
+    re-import is never served after it.
+
+    Each pool read through (the shared one, an ``AsyncQueries`` reader pool, a
+    snapshot) gets its own entries and watcher, so alternating between pools
+    never clears or reopens anything. Pools are held weakly.
+
+    Cached values are shared between callers and must not be mutated.
+
+    Args:
+        maxsize (int): Maximum number of cached results per pool.
+        check_interval (float): Seconds between ``data_version`` checks. Hits in between never
+            touch SQLite, at the cost of seeing commits from other processes up to that much
+            later; 0 checks on every call. In-process imports always invalidate at once.
+    """
+
+    def __init__(self, maxsize: int = 512, check_interval: float = CHECK_INTERVAL):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+
+        self._pools: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.RLock()
+        self._imports = 0
+
+    def _pool_cache(self, pool: connection.ConnectionPool) -> _PoolCache:
+        pool_cache = self._pools.get(pool)
+        if pool_cache is None:
+            with self._lock:
+                pool_cache = self._pools.setdefault(pool, _PoolCache())
+        return pool_cache
+
+    def _check(self, pool_cache: _PoolCache, key: Tuple, now: float) -> Tuple:
+        with pool_cache.watch_lock:
+            watched = pool_cache.watched
+            if watched is not None and watched[0] == key and now - watched[2] < self.check_interval:
+                return watched  # another thread just checked
+
+            if watched is None or watched[0] != key:
+                if pool_cache.watcher is not None:
+                    pool_cache.watcher.close()
+                    pool_cache.watcher = None
+                try:
+                    # Read-only: watching must never create the file or run migrations
+                    pool_cache.watcher = db.open_database(key[0], readonly=True, check_same_thread=False)
+                except sqlite3.OperationalError:
+                    # No database yet; nothing is cached against it until one appears
+                    pool_cache.watched = (key, None, now)
+                    return pool_cache.watched
+            data_version = pool_cache.watcher.execute('PRAGMA data_version').fetchone()[0]
+            pool_cache.watched = (key, data_version, now)
+            return pool_cache.watched
+
+    def _generation(self, pool: connection.ConnectionPool, pool_cache: _PoolCache) -> Tuple:
+        pool.refresh()  # the file may have been swapped, or a snapshot may be due to reload
+        # A swapped-out file never sees another commit; watch whatever the pool now reads
+        key = (pool.path, pool.generation)
+        now = time.monotonic()
+        watched = pool_cache.watched
+        if (
+            watched is None
+            or watched[0] != key
+            or watched[1] is None
+            or now - watched[2] >= self.check_interval
+        ):
+            watched = self._check(pool_cache, key, now)
+        return (pool.path, self._imports, watched[1], pool.generation)
+
+    def generation(self) -> Tuple:
+        """
+        Returns the (path, import counter, data_version, pool generation) generation of the calling thread's pool.
+
+        Between checks this reads no SQLite state and takes no lock.
+        """
+        pool = connection.current_pool()
+        return self._generation(pool, self._pool_cache(pool))
+
+    def invalidate(self) -> None:
+        """
+        Drops every entry and bumps the import counter. Called by the importer after each commit.
+        """
+        with self._lock:
+            self._imports += 1
+            for pool_cache in self._pools.values():
+                pool_cache.entries.clear()
+
+    def call(self, func: Callable, args: tuple, kwargs: Dict):
+        try:
+            key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)  # unhashable arguments are never cached
+
+        pool = connection.current_pool()
+        pool_cache = self._pool_cache(pool)
+        generation = self._generation(pool, pool_cache)
+        entries = pool_cache.entries
+        with self._lock:
+            if generation != pool_cache.generation:
+                entries.clear()
+                pool_cache.generation = generation
+
+            if key in entries:
+                entries.move_to_end(key)
+                self.hits += 1
+                return entries[key]
+            self.misses += 1
+
+        value = func(*args, **kwargs)
+
+        with self._lock:
+            if pool_cache.generation == generation:
+                entries[key] = value
+                while len(entries) > self.maxsize:
+                    entries.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': sum(len(pool_cache.entries) for pool_cache in self._pools.values()),
+                'maxsize': self.maxsize,
+                'pools': len(self._pools),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            pool_caches = list(self._pools.values())
+            self._pools.clear()
+        for pool_cache in pool_caches:
+            pool_cache.close()
+
+
+_cache = ResultCache()
+
+
+def get_cache() -> ResultCache:
+    return _cache
+
+
+def configure(**kwargs) -> ResultCache:
+    """
+    Replaces the shared cache with one built from ``kwargs`` (see ``ResultCache``).
+    """
+    global _cache
+    _cache.close()
+    _cache = ResultCache(**kwargs)
+    return _cache
+
+
+def invalidate() -> None:
+    _cache.invalidate()
+
+
+def cached(func: Callable) -> Callable:
+    """
+    Serves ``func`` through the shared result cache. The undecorated function stays available as ``func.uncached``.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _cache.call(func, args, kwargs)
+
+    wrapper.uncached = func
+    return wrapper
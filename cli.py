@@ -0,0 +1,209 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Subcommands import the query and import modules themselves, so a lookup never
+# pays for the importer (and its process pool) and nothing is imported implicitly.
+
+
+def _use_database(args: argparse.Namespace, readonly: bool = True) -> None:
+    """
+    Points the shared pool at ``--db``. Lookups read through ``mode=ro`` connections,
+    so they never migrate the file, switch its journal mode or otherwise write to it;
+    only the import command opens it writable.
+    """
+    import connection
+    import db
+
+    path = args.db or connection.DB_PATH
+    if readonly:
+        if not os.path.exists(path):
+            sys.exit(f'No catalog at {path}; run the import command first')
+        try:
+            db.open_database(path, readonly=True).close()
+        except db.SchemaOutdatedError as e:
+            sys.exit(str(e))
+    connection.configure(path=path, readonly=readonly, instrument=args.profile)
+
+
+def _print_json(value, args: argparse.Namespace) -> None:
+    import records
+
+    json.dump(value, sys.stdout, ensure_ascii=False, indent=args.indent, cls=records.JSONEncoder)
+    sys.stdout.write('\n')
+
+
+def _parse_build(specs: List[str]) -> Dict[str, int]:
+    """
+    Turns ``['Vibro-Champ=40', 'Champ']`` into ``{'Vibro-Champ': 40, 'Champ': 1}``.
+    """
+    build: Dict[str, int] = {}
+    for spec in specs:
+        name, _, quantity = spec.rpartition('=') if '=' in spec else (spec, '', '1')
+        try:
+            build[name] = build.get(name, 0) + int(quantity)
+        except ValueError:
+            sys.exit(f'Invalid build quantity in {spec!r}; expected AMP=QTY')
+    return build
+
+
+def _print_profile() -> None:
+    import instrument
+
+    report = instrument.report()
+    print(f"{'calls':>7} {'rows':>9} {'total ms':>10} {'p50 ms':>9} {'p99 ms':>9}  statement", file=sys.stderr)
+    for entry in report:
+        sql = entry['sql'] if len(entry['sql']) <= 100 else entry['sql'][:97] + '...'
+        print(f"{entry['calls']:>7} {entry['rows']:>9} {entry['total_ms']:>10.2f} {entry['p50_ms']:>9.3f} "
+              f"{entry['p99_ms']:>9.3f}  {sql}", file=sys.stderr)
+
+
+def cmd_import(args: argparse.Namespace) -> None:
+    import sqlite3
+
+    import importer
+
+    _use_database(args, readonly=False)
+    try:
+        if args.shadow:
+            importer.shadow_import(args.parts, amps=args.amps or None, db_path=args.db, workers=args.workers)
+            return
+        importer.import_tree(
+            args.parts, amps=args.amps or None, db_path=args.db, full=args.full, workers=args.workers
+        )
+    except sqlite3.IntegrityError as e:
+        sys.exit(f'Import rolled back: {e}')
+
+
+def cmd_bom(args: argparse.Namespace) -> None:
+    import queries
+
+    _use_database(args)
+    # One borrowed connection serves every amp
+    with queries.get_db_connection():
+        boms = {amp: queries.get_amp_bom(amp) for amp in args.amps}
+    _print_json(boms if len(args.amps) > 1 else boms[args.amps[0]], args)
+
+
+def cmd_grouped(args: argparse.Namespace) -> None:
+    import queries
+
+    _use_database(args)
+    if args.total:
+        _print_json(queries.get_consolidated_bom(_parse_build(args.amps)), args)
+        return
+
+    with queries.get_db_connection():
+        grouped = {
+            amp: {
+                'resistors': queries.get_all_resistors_by_amp_grouped(amp),
+                'capacitors': queries.get_all_capacitors_by_amp_grouped(amp),
+            }
+            for amp in args.amps
+        }
+    _print_json(grouped if len(args.amps) > 1 else grouped[args.amps[0]], args)
+
+
+def cmd_search(args: argparse.Namespace) -> None:
+    import queries
+
+    _use_database(args)
+    _print_json(queries.search_parts(' '.join(args.term), limit=args.limit), args)
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    import export
+
+    _use_database(args)
+    try:
+        export.export_table(args.table, args.format, args.output, args.brand, raw=args.raw)
+    except (RuntimeError, ValueError) as e:
+        sys.exit(str(e))
+
+
+def cmd_stats(args: argparse.Namespace) -> None:
+    import queries
+
+    _use_database(args)
+    amps = queries.get_all_amps()
+    if args.json:
+        _print_json(amps, args)
+        return
+
+    columns = ('resistor_count', 'capacitor_count', 'pot_count', 'tube_count', 'transformer_count')
+    print(f"{'brand':<16} {'amp':<24} {'res':>6} {'caps':>6} {'pots':>6} {'tubes':>6} {'xfmrs':>6}  complement")
+    for brand, brand_amps in amps.items():
+        for amp in brand_amps:
+            counts = ' '.join(f'{amp[column]:>6}' for column in columns)
+            print(f"{brand:<16} {amp['amp']:<24} {counts}  {amp['tube_complement'] or ''}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Query and maintain the amp parts database.')
+    parser.add_argument('--db', default=None, help='database file (default: amp_parts.db)')
+    parser.add_argument('--indent', type=int, default=2, help='JSON indent; 0 for one line per result')
+    parser.add_argument('--profile', action='store_true', help='print per-statement SQL timings to stderr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import', help='load new or changed CSV files from a parts/ tree')
+    command.add_argument('amps', nargs='*', help='amp directories to load (default: all)')
+    command.add_argument('--parts', default='./parts/', help='root of the parts tree')
+    command.add_argument('--full', action='store_true', help='reload every file, ignoring the manifest')
+    command.add_argument('--shadow', action='store_true',
+                         help='build a complete new database file and swap it in atomically')
+    command.add_argument('--workers', type=int, default=None, help='CSV parsing processes')
+    command.set_defaults(func=cmd_import)
+
+    command = commands.add_parser('bom', help='full bill of materials of one or more amps')
+    command.add_argument('amps', nargs='+')
+    command.set_defaults(func=cmd_bom)
+
+    command = commands.add_parser('grouped', help='resistors and capacitors grouped by value')
+    command.add_argument('amps', nargs='+', metavar='AMP[=QTY]')
+    command.add_argument('--total', action='store_true', help='one consolidated BOM for building QTY of each amp')
+    command.set_defaults(func=cmd_grouped)
+
+    command = commands.add_parser('search', help='full-text search over part numbers, tubes, tapers, amps and brands')
+    command.add_argument('term', nargs='+')
+    command.add_argument('--limit', type=int, default=20)
+    command.set_defaults(func=cmd_search)
+
+    command = commands.add_parser('export', help='stream a part table as CSV, JSON Lines or Parquet')
+    command.add_argument('table', choices=('resistors', 'capacitors', 'pots'))
+    command.add_argument('--brand', default=None, help='only parts of this brand')
+    command.add_argument('--format', choices=('csv', 'jsonl', 'parquet'), default='csv')
+    command.add_argument('--raw', action='store_true', help='stored values (68000) instead of display strings (68kΩ)')
+    command.add_argument('-o', '--output', default=None, help='file to write (default: stdout; required for parquet)')
+    command.set_defaults(func=cmd_export)
+
+    command = commands.add_parser('stats', help='part counts and tube complement per amp')
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(func=cmd_stats)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.indent == 0:
+        args.indent = None
+    if args.profile:
+        logging.basicConfig(format='%(name)s: %(message)s')
+    try:
+        args.func(args)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (e.g. head) went away; silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if args.profile:
+            _print_profile()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
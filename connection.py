@@ -0,0 +1,450 @@
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union
+
+import db
+import instrument
+
+DB_PATH = 'amp_parts.db'
+
+# PRAGMAs applied to every pooled connection when it is first opened
+DEFAULT_PRAGMAS: Dict[str, Union[str, int]] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16_000,        # negative values are KiB, so ~16MB of page cache
+    'mmap_size': 268_435_456,     # 256MB
+    'temp_store': 'MEMORY',
+}
+
+
+# Seconds between checks for a database file swapped in by importer.shadow_import
+FILE_CHECK_INTERVAL = 0.5
+
+# Seconds between checks of the database file for a newer catalog, see SnapshotPool
+SNAPSHOT_CHECK_INTERVAL = 1.0
+
+# Unique memdb names within the process; the pid keeps forked workers apart
+_snapshot_ids = itertools.count(1)
+
+
+def _file_id(path: str) -> Optional[tuple]:
+    """
+    Identifies the file behind ``path``, following symlinks; None if there is none yet.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of warm SQLite connections.
+
+    Connections are opened lazily up to ``size`` and handed out most-recently-used
+    first so the page cache stays hot. A thread that already holds a connection
+    gets the same one back on nested borrows, which lets helpers such as
+    ``queries.get_all_parts_by_amp`` share a single connection with the functions
+    they call.
+
+    When ``importer.shadow_import`` swaps a new file in under ``path``,
+    connections still reading the old file are retired; see ``refresh``.
+
+    Args:
+        path (str): Path to the SQLite database file.
+        size (int): Maximum number of open connections.
+        pragmas (dict): PRAGMA name/value pairs applied to each new connection.
+        timeout (float): Seconds to wait for a free connection before giving up.
+        readonly (bool): Open connections with ``mode=ro``; they never run DDL or take write locks.
+        instrument (bool): Record every statement in ``instrument.get_stats()`` (see ``instrument.InstrumentedConnection``).
+        check_interval (float): Seconds between checks for a swapped database file.
+    """
+
+    # Bumped whenever the pool starts serving a different database state, see SnapshotPool
+    generation = 0
+
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        size: int = 8,
+        pragmas: Optional[Dict[str, Union[str, int]]] = None,
+        timeout: float = 30.0,
+        readonly: bool = False,
+        instrument: bool = False,
+        check_interval: float = FILE_CHECK_INTERVAL,
+    ):
+        self.path = path
+        self.size = size
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.timeout = timeout
+        self.readonly = readonly
+        self.instrument = instrument
+        self.check_interval = check_interval
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._all = []
+        self._opened: Dict[sqlite3.Connection, int] = {}  # connection -> generation it was opened in
+        self._file = _file_id(path)
+        self._checked_at = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        kwargs = {'factory': instrument.InstrumentedConnection} if self.instrument else {}
+        conn = db.open_database(
+            self.path, readonly=self.readonly, timeout=self.timeout, check_same_thread=False, **kwargs
+        )
+        for name, value in self.pragmas.items():
+            # A read-only connection cannot switch the journal mode of the file
+            if self.readonly and name == 'journal_mode':
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _add(self) -> sqlite3.Connection:
+        generation = self.generation
+        conn = self._connect()
+        with self._lock:
+            self._all.append(conn)
+            self._opened[conn] = generation
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Borrows a connection, reusing the one this thread already holds if any.
+
+        Returns:
+            sqlite3.Connection: A ready-to-use connection.
+        """
+        local = self._local
+        if getattr(local, 'conn', None) is not None:
+            local.depth += 1
+            return local.conn
+
+        self.refresh()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._add()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f'No SQLite connection became free within {self.timeout}s'
+                    ) from None
+
+        local.conn = conn
+        local.depth = 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Returns a borrowed connection. The outermost release of a thread puts it back in the pool.
+        """
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+
+        local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        if self._reusable(conn):
+            self._idle.put(conn)
+        else:
+            self._replace(conn)
+
+    def _reusable(self, conn: sqlite3.Connection) -> bool:
+        return self._opened.get(conn) == self.generation
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._opened.pop(conn, None)
+            if conn in self._all:
+                self._all.remove(conn)
+            self._created -= 1
+        conn.close()
+
+    def _replace(self, conn: sqlite3.Connection) -> None:
+        """
+        Closes a connection from an earlier generation and puts a fresh one in its place.
+        """
+        self._discard(conn)
+        with self._lock:
+            self._created += 1
+        try:
+            fresh = self._add()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        self._idle.put(fresh)
+
+    def _retire_idle(self) -> None:
+        """
+        Closes idle connections from earlier generations; borrowed ones are replaced on release.
+        """
+        current = []
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._reusable(conn):
+                current.append(conn)
+            else:
+                self._discard(conn)
+        for conn in current:
+            self._idle.put(conn)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Moves the pool onto a database file swapped in under ``path`` (see ``importer.shadow_import``).
+
+        A connection keeps reading the file it was opened on, and that file's
+        ``data_version`` never moves again once it has been replaced, so the
+        pool compares the identity of the file behind ``path`` instead, at
+        most every ``check_interval`` seconds. Called on every outermost borrow.
+
+        Args:
+            force (bool): Check now rather than waiting for ``check_interval``.
+
+        Returns:
+            bool: True if the pool moved to a new file.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        file_id = _file_id(self.path)
+        with self._lock:
+            if file_id == self._file:
+                return False
+            self._file = file_id
+            self.generation += 1
+        self._retire_idle()
+        return True
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """
+        Closes every connection the pool has opened.
+        """
+        with self._lock:
+            conns, self._all = self._all, []
+            self._created = 0
+            self._opened.clear()
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        for conn in conns:
+            conn.close()
+
+
+class SnapshotPool(ConnectionPool):
+    """
+    A pool of read-only connections to an in-memory copy of the database.
+
+    The file is serialized once and loaded into a named in-memory database
+    (SQLite's memdb VFS) that every connection of the pool shares, so reads
+    never touch the disk and a process holds a single copy of the catalog.
+    A worker process builds its own copy on its first borrow; nothing opened
+    before a fork is reused after it.
+
+    Borrows compare the file's ``PRAGMA data_version`` (and, after a shadow
+    import, its identity) with the one the snapshot was taken at, at most
+    every ``check_interval`` seconds, and an in-process import refreshes the
+    shared pool as soon as it commits. A newer catalog is loaded into a new
+    in-memory database next to the current one and swapped in at once.
+    Connections borrowed before the swap finish on the old snapshot and are
+    replaced when returned, so a reader always sees one complete, consistent
+    catalog.
+
+    Args:
+        path (str): Path to the SQLite database file to copy.
+        size (int): Maximum number of open connections.
+        pragmas (dict): PRAGMA name/value pairs applied to each new connection.
+        timeout (float): Seconds to wait for a free connection before giving up.
+        instrument (bool): Record every statement in ``instrument.get_stats()``.
+        check_interval (float): Seconds between checks of the file for a newer catalog.
+    """
+
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        size: int = 8,
+        pragmas: Optional[Dict[str, Union[str, int]]] = None,
+        timeout: float = 30.0,
+        instrument: bool = False,
+        check_interval: float = SNAPSHOT_CHECK_INTERVAL,
+    ):
+        super().__init__(path, size, pragmas, timeout, readonly=True, instrument=instrument, check_interval=check_interval)
+
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._holder: Optional[sqlite3.Connection] = None
+        self._uri: Optional[str] = None
+        self._data_version: Optional[int] = None
+
+    def _open_snapshot(self, uri: str) -> sqlite3.Connection:
+        kwargs = {'factory': instrument.InstrumentedConnection} if self.instrument else {}
+        return sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        # mode=ro protects the shared copy; TEMP tables still work
+        conn = self._open_snapshot(f'{self._uri}&mode=ro')
+        for name, value in self.pragmas.items():
+            if name != 'journal_mode':
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _load(self) -> None:
+        if self._watcher is None:
+            self._watcher = db.open_database(self.path, readonly=True, check_same_thread=False)
+        # Read the version first: a commit landing before serialize() only makes the copy newer
+        data_version = self._watcher.execute('PRAGMA data_version').fetchone()[0]
+        image = bytearray(self._watcher.serialize())
+        # An in-memory database cannot use WAL; mark the image as a rollback-journal file
+        image[18:20] = b'\x01\x01'
+
+        loader = sqlite3.connect(':memory:')
+        try:
+            loader.deserialize(bytes(image))
+            del image
+            uri = f'file:/amps-snapshot-{os.getpid()}-{next(_snapshot_ids)}?vfs=memdb'
+            holder = self._open_snapshot(uri)  # keeps the shared copy alive while idle
+            loader.backup(holder)
+        finally:
+            loader.close()
+
+        old_holder = self._holder
+        with self._lock:
+            self._holder, self._uri, self._data_version = holder, uri, data_version
+            self.generation += 1
+        if old_holder is not None:
+            old_holder.close()
+        self._retire_idle()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reloads the snapshot if the file has changed since it was taken.
+
+        Args:
+            force (bool): Check the file now rather than waiting for ``check_interval``,
+                and reload even if ``data_version`` has not moved.
+
+        Returns:
+            bool: True if a new snapshot was swapped in.
+        """
+        now = time.monotonic()
+        if not force and self._uri is not None and now - self._checked_at < self.check_interval:
+            return False
+
+        with self._reload_lock:
+            self._checked_at = now
+            file_id = _file_id(self.path)
+            if self._uri is not None and not force and file_id == self._file:
+                if self._watcher.execute('PRAGMA data_version').fetchone()[0] == self._data_version:
+                    return False
+            if file_id != self._file and self._watcher is not None:
+                # The file was swapped; the watcher would never see another commit
+                self._watcher.close()
+                self._watcher = None
+            self._file = file_id
+            self._load()
+            return True
+
+    def close(self) -> None:
+        super().close()
+        with self._reload_lock:
+            for conn in (self._holder, self._watcher):
+                if conn is not None:
+                    conn.close()
+            self._holder = self._watcher = self._uri = self._data_version = None
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+# Per-thread pool overrides, see bind_thread()
+_bound = threading.local()
+
+
+def configure(snapshot: bool = False, **kwargs) -> ConnectionPool:
+    """
+    Replaces the shared pool with one built from ``kwargs`` (see ``ConnectionPool``).
+
+    With ``snapshot=True`` the pool is a ``SnapshotPool`` serving reads from an in-memory copy.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = (SnapshotPool if snapshot else ConnectionPool)(**kwargs)
+        return _pool
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the shared pool, by default a read-only one on ``DB_PATH``.
+
+    Lookups never write: the default pool neither migrates the file nor switches
+    its journal mode. Imports open their own writable connection; ``configure``
+    builds a writable shared pool where one is really needed.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(readonly=True)
+    return _pool
+
+
+def bind_thread(pool: Optional[ConnectionPool]) -> None:
+    """
+    Makes ``connection()`` borrow from ``pool`` on the calling thread only; None restores the shared pool.
+
+    Used by worker threads that must read through their own dedicated connections.
+    """
+    _bound.pool = pool
+
+
+def current_pool() -> ConnectionPool:
+    """
+    Returns the pool ``connection()`` borrows from on the calling thread.
+    """
+    return getattr(_bound, 'pool', None) or get_pool()
+
+
+def connection():
+    """
+    Borrows a connection from the thread's bound pool, or the shared pool, as a context manager.
+    """
+    return current_pool().connection()
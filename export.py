@@ -0,0 +1,152 @@
+import csv
+import sys
+from typing import Iterable, Iterator, List, Mapping, Optional, TextIO
+
+import queries
+import records
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+# Output buffer for file exports; large writes keep syscalls off the hot loop
+WRITE_BUFFER = 1 << 20
+
+# Rows per Arrow record batch in Parquet exports
+PARQUET_BATCH_SIZE = 65536
+
+
+def write_csv(rows: Iterable[Mapping], output: TextIO, raw: bool = False) -> int:
+    """
+    Streams rows to ``output`` as CSV with a header taken from the first row.
+
+    Values are quoted by ``csv.writer`` where needed, so tapers such as
+    'A 2-35, log' stay in one column.
+
+    Args:
+        rows (iterable): Records or dicts sharing the same keys.
+        output (file): Text stream opened with ``newline=''``.
+        raw (bool): Write stored values (e.g. 68000) instead of display strings ('68kΩ').
+
+    Returns:
+        int: Number of rows written.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+
+    columns = list(first)
+    read = records.value_reader(columns, raw)
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    writer.writerow(read(first))
+    count = 1
+    for row in rows:
+        writer.writerow(read(row))
+        count += 1
+    return count
+
+
+def write_jsonl(rows: Iterable[Mapping], output: TextIO, raw: bool = False) -> int:
+    """
+    Streams rows to ``output`` as JSON Lines, one object per row.
+    """
+    encode = records.JSONEncoder(ensure_ascii=False).encode
+    count = 0
+    columns = read = None
+    for row in rows:
+        if read is None:
+            columns = list(row)
+            read = records.value_reader(columns, raw)
+        output.write(encode(dict(zip(columns, read(row)))))
+        output.write('\n')
+        count += 1
+    return count
+
+
+def write_parquet(rows: Iterable[Mapping], path: str, raw: bool = False, batch_size: int = PARQUET_BATCH_SIZE) -> int:
+    """
+    Streams rows to a Parquet file in record batches of ``batch_size`` rows. Requires pyarrow.
+
+    The schema is inferred from the first batch.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Parquet export needs pyarrow (pip install pyarrow)') from None
+
+    writer = None
+    count = 0
+    read = None
+    try:
+        for batch in _batches(rows, batch_size):
+            if read is None:
+                columns = list(batch[0])
+                read = records.value_reader(columns, raw)
+            data = list(zip(*(read(row) for row in batch)))
+            table = pa.Table.from_arrays([pa.array(column) for column in data], names=columns)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export(rows: Iterable[Mapping], fmt: str = 'csv', path: Optional[str] = None, raw: bool = False) -> int:
+    """
+    Streams rows to ``path`` (stdout when None) as CSV, JSON Lines or Parquet.
+
+    Rows are written as they are produced, so memory use does not grow with
+    the number of rows.
+
+    Args:
+        rows (iterable): Records or dicts, e.g. from ``queries.iter_parts``.
+        fmt (str): 'csv', 'jsonl' or 'parquet'.
+        path (str): Output file; Parquet needs one.
+        raw (bool): Write stored values instead of display strings.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown export format {fmt!r}; expected one of {", ".join(FORMATS)}')
+    if fmt == 'parquet':
+        if path is None:
+            raise ValueError('Parquet export needs an output file')
+        return write_parquet(rows, path, raw)
+
+    write = write_csv if fmt == 'csv' else write_jsonl
+    if path is None:
+        return write(rows, sys.stdout, raw)
+    with open(path, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER) as output:
+        return write(rows, output, raw)
+
+
+def export_table(
+    table: str,
+    fmt: str = 'csv',
+    path: Optional[str] = None,
+    brand_name: Optional[str] = None,
+    raw: bool = False,
+) -> int:
+    """
+    Exports a whole part table, or one brand's parts, straight from a streaming cursor.
+
+    Example:
+        export.export_table('resistors', 'csv', 'resistors.csv', raw=True)
+    """
+    return export(queries.iter_parts(table, brand_name), fmt, path, raw)
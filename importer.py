@@ -0,0 +1,844 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cache
+import connection
+import db
+import normalize
+import summaries
+
+# Lookup tables shared by every amp, in load order: (file name, table)
+SHARED_FILES: List[Tuple[str, str]] = [
+    ('bias_types.csv', 'bias_types'),
+    ('tube_functionalities.csv', 'tube_functionalities'),
+    ('amps.csv', 'amps'),
+    ('brands.csv', 'brands'),
+    ('tube_types.csv', 'tube_types'),
+    ('transformer_types.csv', 'transformer_types'),
+    ('winding_types.csv', 'winding_types'),
+    ('core_types.csv', 'core_types'),
+]
+
+# Part tables found in every amp directory, in load order: (file name, table)
+AMP_FILES: List[Tuple[str, str]] = [
+    ('tubes.csv', 'tubes'),
+    ('resistors.csv', 'resistors'),
+    ('capacitors.csv', 'capacitors'),
+    ('pots.csv', 'pots'),
+    ('transformer_windings.csv', 'transformer_windings'),
+    ('transformers.csv', 'transformers'),
+]
+
+# PRAGMAs used only while a bulk load is running. WAL keeps ROLLBACK working
+# if a file fails half way; synchronous=OFF skips the fsyncs until we are done.
+IMPORT_PRAGMAS: Dict[str, str] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'OFF',
+    'cache_size': '-262144',      # ~256MB
+    'temp_store': 'MEMORY',
+}
+
+RESTORE_PRAGMAS: Dict[str, str] = {
+    'synchronous': 'NORMAL',
+}
+
+# Below this many files, spawning worker processes costs more than it saves
+PARALLEL_MIN_FILES = 16
+
+# Earlier shadow-built generations kept after a swap, for readers still opening them
+SHADOW_KEEP = 1
+
+# Seconds a shadow import waits for another one of the same database to finish
+SHADOW_LOCK_TIMEOUT = 600.0
+
+
+def read_csv(file_path: str) -> Tuple[List[str], Iterator[Tuple]]:
+    """
+    Opens a CSV file and returns its header plus a lazy iterator over the remaining rows.
+
+    The file stays open until the iterator is exhausted, so rows are never held in memory all at once.
+
+    Args:
+        file_path (str): Path to the CSV file.
+
+    Returns:
+        tuple: The column names and an iterator of row tuples.
+    """
+    file = open(file_path, 'r', newline='')
+    reader = csv.reader(file)
+    try:
+        columns = next(reader)
+    except StopIteration:
+        file.close()
+        return [], iter(())
+
+    def rows() -> Iterator[Tuple]:
+        with file:
+            for row in reader:
+                if row:
+                    yield tuple(row)
+
+    return columns, rows()
+
+
+def insert_query(table_name: str, columns: List[str]) -> str:
+    placeholders = ', '.join(['?' for _ in columns])
+    return f'INSERT OR IGNORE INTO {table_name} ({", ".join(columns)}) VALUES ({placeholders})'
+
+
+def discover_amps(base_url: str) -> List[str]:
+    """
+    Finds every amp directory under ``base_url``, i.e. every subdirectory holding at least one part CSV.
+    """
+    part_files = {name for name, _ in AMP_FILES}
+    amps = []
+    with os.scandir(base_url) as entries:
+        for entry in entries:
+            if entry.is_dir() and any(name in part_files for name in os.listdir(entry.path)):
+                amps.append(entry.name)
+    return sorted(amps)
+
+
+def _to_integer(value: str):
+    if value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value  # leave it to SQLite's column affinity
+
+
+def _to_real(value: str):
+    if value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _converter(declared_type: str) -> Optional[Callable]:
+    declared_type = (declared_type or '').upper()
+    if 'INT' in declared_type:
+        return _to_integer
+    if any(name in declared_type for name in ('REAL', 'FLOA', 'DOUB')):
+        return _to_real
+    return None
+
+
+def column_types(conn: sqlite3.Connection, tables: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Returns the declared type of every column of ``tables``, keyed by table then column.
+    """
+    return {
+        table: {row[1]: row[2] for row in conn.execute(f'PRAGMA table_info({table})')}
+        for table in set(tables)
+    }
+
+
+def coerce_rows(columns: List[str], rows: Iterable[Tuple], types: Dict[str, str]) -> Iterator[Tuple]:
+    """
+    Converts CSV strings to int/float according to the declared column types. Empty numeric cells become NULL.
+    """
+    converters = [_converter(types.get(column)) for column in columns]
+    if not any(converters):
+        yield from rows
+        return
+
+    converters = [convert or str for convert in converters]
+    width = len(converters)
+    for row in rows:
+        if len(row) == width:
+            yield tuple(map(_apply, converters, row))
+        else:
+            yield row  # malformed row; let SQLite report it
+
+
+def _apply(convert: Callable, value: str):
+    return convert(value)
+
+
+def _prepare(entry: Dict, types: Dict[str, str], rejected: List[str]) -> Tuple[List[str], Iterator[Tuple]]:
+    """
+    Streams one file's rows, coerced to the column types and extended with its normalized columns.
+    """
+    columns, rows = read_csv(entry['path'])
+    source = entry.get('rel_path', entry['path'])
+    return normalize.normalize_rows(
+        entry['table_name'], columns, coerce_rows(columns, rows, types), rejected, source
+    )
+
+
+def parse_file(entry: Dict, types: Dict[str, str]) -> Tuple[List[str], List[Tuple], List[str]]:
+    """
+    Reads, type-coerces and normalizes a whole CSV file. Runs in the import worker processes.
+    """
+    rejected = []
+    columns, rows = _prepare(entry, types, rejected)
+    return columns, list(rows), rejected
+
+
+def iter_parsed(
+    entries: List[Dict],
+    types: Dict[str, Dict[str, str]],
+    workers: int = 1,
+    rejected: Optional[List[str]] = None,
+) -> Iterator[Tuple[Dict, List[str], Iterator[Tuple]]]:
+    """
+    Yields (entry, columns, rows) for each file, in the order given.
+
+    With several workers and enough files, parsing runs in a process pool a few
+    files ahead of the caller, which stays the only process writing to SQLite.
+    Otherwise rows are streamed lazily from the file. Rows failing normalization
+    are skipped and described in ``rejected``.
+    """
+    if rejected is None:
+        rejected = []
+
+    if workers <= 1 or len(entries) < PARALLEL_MIN_FILES:
+        for entry in entries:
+            columns, rows = _prepare(entry, types[entry['table_name']], rejected)
+            yield entry, columns, rows
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        remaining = iter(entries)
+        pending = deque()
+
+        def submit() -> None:
+            entry = next(remaining, None)
+            if entry is not None:
+                pending.append((entry, pool.submit(parse_file, entry, types[entry['table_name']])))
+
+        # Keep a bounded window of parsed files in flight so memory stays flat
+        for _ in range(workers * 2):
+            submit()
+
+        while pending:
+            entry, future = pending.popleft()
+            submit()
+            columns, rows, file_rejected = future.result()
+            rejected.extend(file_rejected)
+            yield entry, columns, iter(rows)
+
+
+def list_files(base_url: str, amps: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Lists the (file path, table) pairs making up a ``parts/`` tree, in load order.
+    """
+    files = [(os.path.join(base_url, name), table) for name, table in SHARED_FILES]
+    for amp in amps:
+        files.extend(
+            (os.path.join(base_url, amp, name), table) for name, table in AMP_FILES
+        )
+    return [(path, table) for path, table in files if os.path.exists(path)]
+
+
+def upsert_query(table_name: str, columns: List[str]) -> str:
+    """
+    Builds an INSERT that updates rows whose id already exists and ignores any other conflict.
+    """
+    updates = ', '.join(f'{column} = excluded.{column}' for column in columns if column != 'id')
+    if 'id' not in columns or not updates:
+        return insert_query(table_name, columns)
+
+    placeholders = ', '.join(['?' for _ in columns])
+    return (
+        f'INSERT INTO {table_name} ({", ".join(columns)}) VALUES ({placeholders}) '
+        f'ON CONFLICT (id) DO UPDATE SET {updates} '
+        f'ON CONFLICT DO NOTHING'
+    )
+
+
+def file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def plan_import(
+    conn: sqlite3.Connection,
+    base_url: str,
+    files: List[Tuple[str, str]],
+    full: bool = False,
+) -> Dict[str, List[Dict]]:
+    """
+    Compares source files against the import manifest.
+
+    A file whose size and mtime match its manifest entry is skipped after a single
+    ``stat``. Otherwise it is hashed: a matching hash only refreshes the stored
+    stat, a different one schedules the file for re-import. Manifest entries whose
+    file no longer exists are scheduled for removal.
+
+    Args:
+        conn (sqlite3.Connection): Connection to an initialized database.
+        base_url (str): Root of the parts tree; manifest paths are relative to it.
+        files (list): (file path, table) pairs, in load order.
+        full (bool): Re-import every file regardless of the manifest.
+
+    Returns:
+        dict: ``changed``, ``touched`` and ``removed`` lists of manifest entries, plus ``unchanged``.
+    """
+    manifest = {
+        row[0]: row
+        for row in conn.execute('SELECT path, table_name, size, mtime_ns, sha256 FROM import_manifest')
+    }
+    plan = {'changed': [], 'touched': [], 'removed': [], 'unchanged': []}
+    seen = set()
+
+    for file_path, table_name in files:
+        rel_path = os.path.relpath(file_path, base_url)
+        seen.add(rel_path)
+        stat = os.stat(file_path)
+        entry = {
+            'path': file_path,
+            'rel_path': rel_path,
+            'table_name': table_name,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        previous = manifest.get(rel_path)
+
+        if not full and previous and previous[2:4] == (stat.st_size, stat.st_mtime_ns):
+            plan['unchanged'].append(entry)
+            continue
+
+        entry['sha256'] = file_digest(file_path)
+        if not full and previous and previous[4] == entry['sha256']:
+            plan['touched'].append(entry)
+        else:
+            plan['changed'].append(entry)
+
+    for rel_path, row in manifest.items():
+        if rel_path not in seen and not os.path.exists(os.path.join(base_url, rel_path)):
+            plan['removed'].append({'rel_path': rel_path, 'table_name': row[1]})
+
+    return plan
+
+
+def _set_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, str]) -> None:
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def _drop_indexes(conn: sqlite3.Connection, tables: Iterable[str]) -> List[str]:
+    """
+    Drops the secondary indexes on ``tables`` and returns the SQL needed to rebuild them.
+    """
+    tables = sorted(set(tables))
+    placeholders = ', '.join(['?' for _ in tables])
+    indexes = conn.execute(f'''
+    SELECT name, sql
+    FROM sqlite_master
+    WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    ''', tables).fetchall()
+
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX {name}')
+    return [sql for _, sql in indexes]
+
+
+def _delete_file_rows(conn: sqlite3.Connection, table_name: str, rel_path: str, keep_incoming: bool) -> None:
+    """
+    Deletes the rows a source file produced last time, except the ids it still contains.
+
+    Rows another file has claimed since are left alone; ``_check_ownership``
+    decides whether that claim is allowed.
+    """
+    keep = 'AND mine.row_id NOT IN (SELECT id FROM temp.incoming_ids)' if keep_incoming else ''
+    conn.execute(f'''
+    DELETE FROM {table_name}
+    WHERE id IN (
+        SELECT mine.row_id
+        FROM import_manifest_rows mine
+        WHERE mine.path = ? {keep}
+          AND NOT EXISTS (
+              SELECT 1
+              FROM import_manifest_rows other
+              JOIN import_manifest f ON f.path = other.path
+              WHERE other.row_id = mine.row_id AND other.path != mine.path AND f.table_name = ?
+          )
+    )
+    ''', (rel_path, table_name))
+    conn.execute('DELETE FROM import_manifest_rows WHERE path = ?', (rel_path,))
+
+
+def _check_ownership(conn: sqlite3.Connection, paths: Iterable[str]) -> None:
+    """
+    Fails the load if an id of one of the just-loaded ``paths`` also belongs to another file of its table.
+
+    Ids are upserted, so the second file would silently overwrite the first
+    file's row, and deleting either file later would delete it for both. An
+    id may move between files as long as it ends up in only one of them. Only
+    the loaded files' ids are looked up (through ``idx_import_manifest_rows_row_id``),
+    as files left untouched could not have introduced a clash.
+    """
+    clashes = conn.execute('''
+    SELECT f.table_name, m.row_id, GROUP_CONCAT(m.path, ', ')
+    FROM (
+        SELECT DISTINCT row_id
+        FROM import_manifest_rows
+        WHERE path IN (SELECT value FROM json_each(?))
+    ) loaded
+    JOIN import_manifest_rows m ON m.row_id = loaded.row_id
+    JOIN import_manifest f ON f.path = m.path
+    GROUP BY f.table_name, m.row_id
+    HAVING COUNT(*) > 1
+    ORDER BY f.table_name, m.row_id
+    LIMIT 10
+    ''', (json.dumps(sorted(set(paths))),)).fetchall()
+    if clashes:
+        details = '; '.join(f'{table} id {row_id} in {paths}' for table, row_id, paths in clashes)
+        raise sqlite3.IntegrityError(f'Part ids must be unique across the parts tree: {details}')
+
+
+def _watch_moves(conn: sqlite3.Connection, tables: Iterable[str]) -> None:
+    """
+    Queues the previous amp of every row an upsert moves to another amp for a summary refresh.
+
+    Incoming rows only name their new amp, so the old one is caught by a
+    temporary trigger. Only updates fire it; plain inserts cost nothing.
+    """
+    for table in sorted(set(tables)):
+        amp_column = summaries.AMP_COLUMNS.get(table)
+        if amp_column is None or amp_column == 'id':
+            continue
+        # A NOT EXISTS guard rather than OR IGNORE: the upsert's conflict policy would override it
+        conn.execute(f'''
+        CREATE TEMP TRIGGER IF NOT EXISTS import_moves_{table}
+        BEFORE UPDATE OF {amp_column} ON main.{table}
+        WHEN old.{amp_column} IS NOT NULL AND old.{amp_column} IS NOT new.{amp_column}
+        BEGIN
+            INSERT INTO amp_summary_dirty (amp_id)
+            SELECT old.{amp_column}
+            WHERE NOT EXISTS (SELECT 1 FROM amp_summary_dirty WHERE amp_id = old.{amp_column});
+        END
+        ''')
+
+
+def _unwatch_moves(conn: sqlite3.Connection) -> None:
+    for table in summaries.AMP_COLUMNS:
+        conn.execute(f'DROP TRIGGER IF EXISTS temp.import_moves_{table}')
+
+
+def _mark_file_amps(conn: sqlite3.Connection, table_name: str, rel_path: str) -> None:
+    """
+    Queues the amps of the rows a source file produced last time for a summary refresh.
+    """
+    amp_column = summaries.AMP_COLUMNS.get(table_name)
+    if amp_column is None:
+        return
+    conn.execute(f'''
+    INSERT OR IGNORE INTO amp_summary_dirty (amp_id)
+    SELECT DISTINCT {amp_column}
+    FROM {table_name}
+    WHERE {amp_column} IS NOT NULL
+      AND id IN (SELECT row_id FROM import_manifest_rows WHERE path = ?)
+    ''', (rel_path,))
+
+
+def _collect(rows: Iterator[Tuple], index: int, values: set) -> Iterator[Tuple]:
+    for row in rows:
+        if len(row) > index:
+            values.add(row[index])
+        yield row
+
+
+def _load_tracked_file(conn: sqlite3.Connection, entry: Dict, rows: Iterator[Tuple], columns: List[str]) -> None:
+    """
+    Upserts one changed file, deletes rows it no longer contains and records it in the manifest.
+    """
+    id_index = columns.index('id') if 'id' in columns else None
+    ids = []
+
+    def tracked(rows: Iterator[Tuple]) -> Iterator[Tuple]:
+        for row in rows:
+            if id_index is not None:
+                ids.append((row[id_index],))
+            yield row
+
+    _mark_file_amps(conn, entry['table_name'], entry['rel_path'])
+    if columns:
+        conn.executemany(upsert_query(entry['table_name'], columns), tracked(rows))
+
+    conn.execute('DELETE FROM temp.incoming_ids')
+    conn.executemany('INSERT OR IGNORE INTO temp.incoming_ids (id) VALUES (?)', ids)
+    _delete_file_rows(conn, entry['table_name'], entry['rel_path'], keep_incoming=True)
+    conn.execute(
+        'INSERT INTO import_manifest_rows (path, row_id) SELECT ?, id FROM temp.incoming_ids',
+        (entry['rel_path'],)
+    )
+    conn.execute('''
+    INSERT INTO import_manifest (path, table_name, size, mtime_ns, sha256, imported_at)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (path) DO UPDATE SET
+        table_name = excluded.table_name,
+        size = excluded.size,
+        mtime_ns = excluded.mtime_ns,
+        sha256 = excluded.sha256,
+        imported_at = excluded.imported_at
+    ''', (entry['rel_path'], entry['table_name'], entry['size'], entry['mtime_ns'], entry['sha256']))
+
+
+def bulk_load(
+    conn: sqlite3.Connection,
+    files: List,
+    defer_indexes: bool = True,
+    touched: List[Dict] = (),
+    removed: List[Dict] = (),
+    workers: int = 1,
+) -> Dict:
+    """
+    Loads CSV files into their tables inside a single transaction.
+
+    Rows are streamed from each ``csv.reader`` straight into ``executemany``, or
+    parsed ahead by a pool of ``workers`` processes while this connection remains
+    the single writer. When
+    ``defer_indexes`` is set, secondary indexes on the target tables are dropped
+    before the load and rebuilt once at the end, still inside the same transaction.
+    Amp summaries are refreshed for the amps whose parts changed before the
+    commit. Any exception rolls the whole load back. Rows whose textual specs can't be
+    normalized (see ``normalize.NORMALIZERS``) are skipped and reported.
+
+    ``files`` holds either plain (file path, table) pairs, which are inserted with
+    ``INSERT OR IGNORE``, or manifest entries from ``plan_import``, which are
+    upserted and recorded in the import manifest along with ``touched`` and
+    ``removed`` entries.
+
+    Args:
+        conn (sqlite3.Connection): Connection to an initialized database.
+        files (list): Files to load, in load order.
+        defer_indexes (bool): Rebuild secondary indexes after loading instead of updating them per row.
+        touched (list): Manifest entries whose content is unchanged but whose stat must be refreshed.
+        removed (list): Manifest entries whose source file is gone.
+        workers (int): Processes used to parse and coerce CSV files; see ``iter_parsed``.
+
+    Returns:
+        dict: Number of files and rows read, elapsed seconds, rows per second and
+        the ``rejected`` row messages.
+    """
+    started = time.perf_counter()
+    row_count = 0
+    rejected = []
+    dirty_amps = set()
+
+    def counted(rows: Iterator[Tuple]) -> Iterator[Tuple]:
+        nonlocal row_count
+        for row in rows:
+            row_count += 1
+            yield row
+
+    entries = [
+        file if isinstance(file, dict) else {'path': file[0], 'table_name': file[1]}
+        for file in files
+    ]
+
+    _set_pragmas(conn, IMPORT_PRAGMAS)
+    conn.commit()
+    try:
+        conn.execute('BEGIN')
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS incoming_ids (id INTEGER PRIMARY KEY)')
+        index_sql = []
+        if defer_indexes:
+            index_sql = _drop_indexes(conn, [entry['table_name'] for entry in entries])
+
+        tracked_tables = [entry['table_name'] for entry in (*entries, *removed) if 'rel_path' in entry]
+        _watch_moves(conn, tracked_tables)
+
+        for entry in removed:
+            _mark_file_amps(conn, entry['table_name'], entry['rel_path'])
+            _delete_file_rows(conn, entry['table_name'], entry['rel_path'], keep_incoming=False)
+            conn.execute('DELETE FROM import_manifest WHERE path = ?', (entry['rel_path'],))
+
+        types = column_types(conn, [entry['table_name'] for entry in entries])
+        for entry, columns, rows in iter_parsed(entries, types, workers, rejected):
+            amp_column = summaries.AMP_COLUMNS.get(entry['table_name'])
+            if amp_column in columns:
+                rows = _collect(rows, columns.index(amp_column), dirty_amps)
+            if 'rel_path' in entry:
+                _load_tracked_file(conn, entry, counted(rows), columns)
+            elif columns:
+                conn.executemany(insert_query(entry['table_name'], columns), counted(rows))
+
+        conn.executemany(
+            'UPDATE import_manifest SET size = ?, mtime_ns = ? WHERE path = ?',
+            [(entry['size'], entry['mtime_ns'], entry['rel_path']) for entry in touched]
+        )
+
+        loaded_paths = [entry['rel_path'] for entry in entries if 'rel_path' in entry]
+        if loaded_paths:
+            _check_ownership(conn, loaded_paths)
+        for sql in index_sql:
+            conn.execute(sql)
+        summaries.refresh(conn, dirty_amps)
+        conn.commit()
+        cache.invalidate()
+    except BaseException:
+        # Bad input, a parse worker failing or an interrupt must not leave the load open:
+        # the pragmas below can't change inside a transaction and would mask the error
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        _unwatch_moves(conn)
+        _set_pragmas(conn, RESTORE_PRAGMAS)
+
+    seconds = time.perf_counter() - started
+    return {
+        'files': len(entries),
+        'removed': len(removed),
+        'rows': row_count,
+        'seconds': seconds,
+        'rows_per_sec': row_count / seconds if seconds else 0.0,
+        'rejected': rejected,
+    }
+
+
+def import_tree(
+    base_url: str = './parts/',
+    amps: Optional[Iterable[str]] = None,
+    db_path: Optional[str] = None,
+    full: bool = False,
+    workers: Optional[int] = None,
+) -> Dict:
+    """
+    Imports the new or changed files of a ``parts/`` tree in one transaction and prints the load rate.
+
+    Files already recorded in the import manifest with the same size and mtime are
+    skipped, so an import with nothing to do costs one ``stat`` per file.
+
+    Args:
+        base_url (str): Root of the parts tree.
+        amps (iterable): Amp directory names under ``base_url``; discovered automatically when omitted.
+        db_path (str): Database to load into; defaults to ``connection.DB_PATH``.
+        full (bool): Re-import every file even if the manifest says it is unchanged.
+        workers (int): CSV parsing processes; defaults to the number of CPUs.
+
+    Returns:
+        dict: Load statistics, see ``bulk_load``, plus the number of unchanged files.
+    """
+    if amps is None:
+        amps = discover_amps(base_url)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    conn = db.open_database(db_path)
+    try:
+        plan = plan_import(conn, base_url, list_files(base_url, amps), full=full)
+        if not (plan['changed'] or plan['touched'] or plan['removed']):
+            print(f"Catalog up to date ({len(plan['unchanged'])} files unchanged)")
+            return {'files': 0, 'removed': 0, 'rows': 0, 'seconds': 0.0,
+                    'rows_per_sec': 0.0, 'rejected': [], 'unchanged': len(plan['unchanged'])}
+
+        # Rebuilding indexes only pays off when most of the catalog is being loaded
+        first_load = not (plan['unchanged'] or plan['touched'])
+        stats = bulk_load(
+            conn,
+            plan['changed'],
+            defer_indexes=full or first_load,
+            touched=plan['touched'],
+            removed=plan['removed'],
+            workers=workers,
+        )
+    finally:
+        conn.close()
+
+    _refresh_readers(db_path)
+
+    stats['unchanged'] = len(plan['unchanged'])
+    print(
+        f"Imported {stats['rows']} rows from {stats['files']} files "
+        f"in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec), "
+        f"{stats['removed']} removed, {stats['unchanged']} unchanged"
+    )
+    for message in stats['rejected']:
+        print(f'Rejected {message}')
+    return stats
+
+
+def _refresh_readers(db_path: Optional[str]) -> None:
+    """
+    Moves the shared pool onto the new catalog now rather than at its next check.
+    """
+    pool = connection.get_pool()
+    if os.path.abspath(pool.path) == os.path.abspath(db_path or connection.DB_PATH):
+        pool.refresh(force=True)
+
+
+def _generations(db_path: str) -> List[Tuple[int, str]]:
+    directory, name = os.path.split(os.path.abspath(db_path))
+    pattern = re.compile(re.escape(name) + r'\.g(\d+)$')
+    matches = (pattern.match(entry) for entry in os.listdir(directory))
+    return sorted((int(match.group(1)), os.path.join(directory, match.group(0))) for match in matches if match)
+
+
+def _remove_database(path: str) -> None:
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def _fsync(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # directories cannot be opened on every platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _swap(db_path: str, shadow: str) -> None:
+    """
+    Points ``db_path`` at ``shadow`` in one atomic rename.
+
+    ``db_path`` becomes a symlink to the newest generation. SQLite names a
+    database's -wal and -shm files after the file the link resolves to, so the
+    old and new generations never share them, which renaming one database
+    over another that is still open would.
+    """
+    was_file = os.path.isfile(db_path) and not os.path.islink(db_path)
+    link = f'{db_path}.swap-{os.getpid()}'
+    try:
+        os.symlink(os.path.basename(shadow), link)
+    except (OSError, NotImplementedError):
+        # No symlinks here: empty the live WAL into its file and rename over it.
+        # Readers must be closed for this, and on Windows the rename fails while they are open.
+        if os.path.exists(db_path):
+            live = sqlite3.connect(db_path)
+            try:
+                live.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            finally:
+                live.close()
+        os.replace(shadow, db_path)
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        return
+
+    try:
+        os.replace(link, db_path)
+    except OSError:
+        os.remove(link)
+        raise
+    _fsync(os.path.dirname(os.path.abspath(db_path)))
+    if was_file:
+        # The catalog replaced by the first swap was a plain file; nothing opens its WAL by this name again
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+@contextmanager
+def _shadow_lock(db_path: str) -> Iterator[None]:
+    """
+    Serializes shadow imports of ``db_path`` across processes.
+
+    Picking the next generation number, building it and deleting old generations
+    all happen under the lock, so two runs never build into the same file or
+    delete each other's. The lock is an exclusive transaction on the SQLite file
+    ``<db_path>.lock``: it works on every platform and is released if the
+    holder dies.
+    """
+    lock = sqlite3.connect(f'{db_path}.lock', timeout=SHADOW_LOCK_TIMEOUT, isolation_level=None)
+    try:
+        try:
+            lock.execute('BEGIN EXCLUSIVE')
+        except sqlite3.OperationalError as e:
+            raise sqlite3.OperationalError(f'Another shadow import of {db_path} is still running ({e})') from e
+        yield
+    finally:
+        lock.close()  # rolls back, releasing the lock
+
+
+def shadow_import(
+    base_url: str = './parts/',
+    amps: Optional[Iterable[str]] = None,
+    db_path: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict:
+    """
+    Builds a complete new catalog next to the live one and swaps it in atomically.
+
+    The tree is loaded into a fresh ``<db_path>.gNNNNNN`` file with its schema,
+    indexes and ``ANALYZE`` statistics, which must pass ``PRAGMA integrity_check``
+    before ``db_path`` is switched over to it (see ``_swap``). Readers never see
+    a half-loaded catalog or wait on the import's locks: connections opened
+    before the swap keep reading the previous generation until their pool moves
+    them over (see ``connection.ConnectionPool.refresh``). The previous
+    ``SHADOW_KEEP`` generations are kept for readers that resolved the old
+    path just before the swap; older ones are deleted. Concurrent shadow imports
+    of one database run one at a time (see ``_shadow_lock``). If anything fails,
+    the new file is removed and the live catalog is left as it was.
+
+    Later ``import_tree`` calls update the new generation in place as usual.
+
+    Args:
+        base_url (str): Root of the parts tree.
+        amps (iterable): Amp directory names under ``base_url``; discovered automatically when omitted.
+        db_path (str): Database path to swap; defaults to ``connection.DB_PATH``.
+        workers (int): CSV parsing processes; defaults to the number of CPUs.
+
+    Returns:
+        dict: Load statistics, see ``bulk_load``, plus the ``path`` of the new generation.
+    """
+    db_path = db_path or connection.DB_PATH
+    if amps is None:
+        amps = discover_amps(base_url)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with _shadow_lock(db_path):
+        generations = _generations(db_path)
+        number = generations[-1][0] + 1 if generations else 1
+        directory, name = os.path.split(os.path.abspath(db_path))
+        shadow = os.path.join(directory, f'{name}.g{number:06d}')
+
+        started = time.perf_counter()
+        _remove_database(shadow)
+        try:
+            conn = db.open_database(shadow)
+            try:
+                plan = plan_import(conn, base_url, list_files(base_url, amps), full=True)
+                stats = bulk_load(conn, plan['changed'], defer_indexes=True, workers=workers)
+                conn.execute('ANALYZE')
+                conn.commit()
+                problems = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+                if problems != ['ok']:
+                    raise sqlite3.DatabaseError(f'{shadow} failed its integrity check: ' + '; '.join(problems[:5]))
+            finally:
+                conn.close()  # checkpoints the WAL, leaving one self-contained file
+            _fsync(shadow)
+            _swap(db_path, shadow)
+        except BaseException:
+            _remove_database(shadow)
+            raise
+
+        for _, path in generations[:max(0, len(generations) - SHADOW_KEEP)]:
+            _remove_database(path)
+        _refresh_readers(db_path)
+
+    stats['path'] = shadow
+    print(
+        f"Built {os.path.basename(shadow)} with {stats['rows']} rows from {stats['files']} files "
+        f"in {time.perf_counter() - started:.2f}s and swapped it in as {db_path}"
+    )
+    for message in stats['rejected']:
+        print(f'Rejected {message}')
+    return stats
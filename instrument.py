@@ -0,0 +1,269 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Executions kept per statement for the latency percentiles
+SAMPLE_WINDOW = 1024
+
+# Statements slower than this (seconds) get their query plan logged, once per statement
+SLOW_QUERY_SECONDS = 0.05
+
+# SQLite VM instructions between progress callbacks; each callback adds this many steps
+PROGRESS_STEPS = 1000
+
+# IN lists of any length share one entry: "IN (?, ?, ?)" -> "IN (?...)"
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def normalize_sql(sql: str) -> str:
+    return _PLACEHOLDER_LIST.sub('(?...)', ' '.join(sql.split()))
+
+
+def percentile_ms(samples: List[float], pct: float, digits: int = 3) -> float:
+    """
+    Returns the ``pct`` percentile of sorted durations in seconds, in milliseconds rounded to ``digits``.
+    """
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return round(samples[index] * 1000, digits)
+
+
+class QueryStats:
+    """
+    Per-statement counters for every instrumented connection in the process.
+
+    Each executed statement is keyed by its normalized SQL and tracks calls,
+    rows fetched, SQLite VM steps and wall time, including the time spent
+    fetching rows after ``execute`` returned. The first time a statement runs
+    longer than ``slow_seconds``, its ``EXPLAIN QUERY PLAN`` is logged on the
+    ``instrument`` logger at WARNING, so full table scans show up without
+    anyone going looking.
+
+    Args:
+        window (int): Recent executions kept per statement for percentiles.
+        slow_seconds (float): Threshold for slow-query plan logging; None disables it.
+    """
+
+    def __init__(self, window: int = SAMPLE_WINDOW, slow_seconds: Optional[float] = SLOW_QUERY_SECONDS):
+        self.window = window
+        self.slow_seconds = slow_seconds
+        self._entries: Dict[str, Dict] = {}
+        self._explained = set()
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> Dict:
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.setdefault(key, {
+                    'calls': 0, 'rows': 0, 'steps': 0, 'seconds': 0.0,
+                    'samples': deque(maxlen=self.window),
+                })
+        return entry
+
+    def start(self, sql: str) -> List:
+        """
+        Counts one execution of ``sql`` and returns its sample, ``[seconds, key]``, for ``add`` to extend.
+        """
+        key = normalize_sql(sql)
+        entry = self._entry(key)
+        sample = [0.0, key]
+        with self._lock:
+            entry['calls'] += 1
+            entry['samples'].append(sample)
+        return sample
+
+    def add(self, sample: List, seconds: float, rows: int = 0, steps: int = 0) -> bool:
+        """
+        Adds time, rows and VM steps to an execution. Returns True when it is slow and not yet explained.
+        """
+        with self._lock:
+            entry = self._entries[sample[1]]
+            entry['seconds'] += seconds
+            entry['rows'] += rows
+            entry['steps'] += steps
+            sample[0] += seconds
+        return (
+            self.slow_seconds is not None
+            and sample[0] >= self.slow_seconds
+            and sample[1] not in self._explained
+        )
+
+    def explain(self, conn: sqlite3.Connection, sql: str, params, sample: List) -> None:
+        """
+        Logs the query plan of a slow statement, once per statement.
+        """
+        with self._lock:
+            if sample[1] in self._explained:
+                return
+            self._explained.add(sample[1])
+        try:
+            plan = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+        except sqlite3.Error as e:
+            plan = [(None, None, None, f'plan unavailable: {e}')]
+        logger.warning(
+            'Slow query (%.1fms so far): %s\n%s',
+            sample[0] * 1000, sample[1], '\n'.join(f'  {row[3]}' for row in plan)
+        )
+
+    def report(self, top: Optional[int] = None) -> List[Dict]:
+        """
+        Returns one entry per statement, slowest total time first.
+
+        Each entry has the normalized ``sql``, ``calls``, ``rows``, ``vm_steps``,
+        ``total_ms``, ``mean_ms`` and p50/p90/p99 over the recent window.
+        """
+        with self._lock:
+            snapshot = [
+                (key, dict(entry), sorted(sample[0] for sample in entry['samples']))
+                for key, entry in self._entries.items()
+            ]
+
+        report = [
+            {
+                'sql': key,
+                'calls': entry['calls'],
+                'rows': entry['rows'],
+                'vm_steps': entry['steps'],
+                'total_ms': round(entry['seconds'] * 1000, 3),
+                'mean_ms': round(entry['seconds'] * 1000 / entry['calls'], 3),
+                'p50_ms': percentile_ms(samples, 50),
+                'p90_ms': percentile_ms(samples, 90),
+                'p99_ms': percentile_ms(samples, 99),
+            }
+            for key, entry, samples in snapshot if samples
+        ]
+        report.sort(key=lambda item: item['total_ms'], reverse=True)
+        return report[:top] if top else report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._explained.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    A cursor that times ``execute`` and every fetch, attributing both to the statement being read.
+    """
+
+    _sample: Optional[List] = None
+    _sql: Optional[str] = None
+    _params = ()
+
+    def _record(self, started: float, steps_before: int, rows: int = 0) -> None:
+        seconds = time.perf_counter() - started
+        conn = self.connection
+        if _stats.add(self._sample, seconds, rows, conn.steps - steps_before):
+            _stats.explain(conn, self._sql, self._params, self._sample)
+
+    def execute(self, sql: str, parameters=()):
+        self._sql, self._params = sql, parameters
+        self._sample = _stats.start(sql)
+        steps, started = self.connection.steps, time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(started, steps)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        self._sql, self._params = sql, ()  # the plan is explained without bindings
+        self._sample = _stats.start(sql)
+        steps, started = self.connection.steps, time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(started, steps, max(self.rowcount, 0))
+
+    def fetchone(self):
+        if self._sample is None:
+            return super().fetchone()
+        steps, started = self.connection.steps, time.perf_counter()
+        row = super().fetchone()
+        self._record(started, steps, row is not None)
+        return row
+
+    def fetchmany(self, size: Optional[int] = None):
+        if self._sample is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        steps, started = self.connection.steps, time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record(started, steps, len(rows))
+        return rows
+
+    def fetchall(self):
+        if self._sample is None:
+            return super().fetchall()
+        steps, started = self.connection.steps, time.perf_counter()
+        rows = super().fetchall()
+        self._record(started, steps, len(rows))
+        return rows
+
+    def __next__(self):
+        if self._sample is None:
+            return super().__next__()
+        steps, started = self.connection.steps, time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._record(started, steps)
+            raise
+        self._record(started, steps, 1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    A connection whose statements are recorded in the shared ``QueryStats``.
+
+    Pass it as ``factory`` to ``sqlite3.connect``; ``connection.ConnectionPool``
+    does so when created with ``instrument=True``. A progress handler counts VM
+    steps, in units of ``PROGRESS_STEPS``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.steps = 0
+        self.set_progress_handler(self._progress, PROGRESS_STEPS)
+
+    def _progress(self) -> int:
+        self.steps += PROGRESS_STEPS
+        return 0  # keep running
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or InstrumentedCursor)
+
+    def execute(self, sql: str, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+_stats = QueryStats()
+
+
+def get_stats() -> QueryStats:
+    return _stats
+
+
+def configure(**kwargs) -> QueryStats:
+    """
+    Replaces the shared statistics with a fresh ``QueryStats`` built from ``kwargs``.
+    """
+    global _stats
+    _stats = QueryStats(**kwargs)
+    return _stats
+
+
+def report(top: Optional[int] = None) -> List[Dict]:
+    return _stats.report(top)
+
+
+def reset() -> None:
+    _stats.reset()
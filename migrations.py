@@ -0,0 +1,225 @@
+import sqlite3
+from typing import Callable, List, Tuple, Union
+
+import normalize
+import summaries
+
+# A migration step: SQL to execute, or a function run with the connection (e.g. a Python backfill)
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+# Full-text search sources: (table, searched column, kind, kind code, amp id expression).
+# parts_fts rowids are ``id * 8 + kind code`` so triggers can find an entry without a scan.
+FTS_SOURCES: List[Tuple[str, str, str, int, str]] = [
+    ('amps', 'amp', 'amp', 1, 'id'),
+    ('brands', 'brand', 'brand', 2, 'NULL'),
+    ('transformers', 'part_number', 'transformer', 3, 'amp_id'),
+    ('tubes', 'name', 'tube', 4, 'amp_id'),
+    ('pots', 'taper', 'pot', 5, 'amp_id'),
+]
+
+
+def _fts_statements() -> List[str]:
+    """
+    Creates the parts_fts index, its sync triggers, and backfills it from existing rows.
+    """
+    statements = ['''
+        CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5(
+            term,
+            kind UNINDEXED,
+            ref_id UNINDEXED,
+            amp_id UNINDEXED,
+            prefix = '2 3'
+        )
+    ''']
+
+    for table, column, kind, code, amp_id in FTS_SOURCES:
+        new_amp_id = 'NULL' if amp_id == 'NULL' else f'new.{amp_id}'
+        insert = f'''
+            INSERT INTO parts_fts (rowid, term, kind, ref_id, amp_id)
+            SELECT new.id * 8 + {code}, new.{column}, '{kind}', new.id, {new_amp_id}
+            WHERE new.{column} IS NOT NULL;
+        '''
+        delete = f'DELETE FROM parts_fts WHERE rowid = old.id * 8 + {code};'
+
+        statements += [
+            f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                {insert}
+            END
+            ''',
+            f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                {delete}
+            END
+            ''',
+            f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE ON {table} BEGIN
+                {delete}
+                {insert}
+            END
+            ''',
+            f'''
+            INSERT OR REPLACE INTO parts_fts (rowid, term, kind, ref_id, amp_id)
+            SELECT id * 8 + {code}, {column}, '{kind}', id, {amp_id}
+            FROM {table}
+            WHERE {column} IS NOT NULL
+            ''',
+        ]
+
+    return statements
+
+
+# Ordered schema migrations: (version, description, statements).
+# Append new entries with the next version number; never edit an applied one.
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, 'indexes on join and filter columns', [
+        'CREATE INDEX IF NOT EXISTS idx_amps_amp ON amps (amp)',
+        'CREATE INDEX IF NOT EXISTS idx_amps_brand_id ON amps (brand_id)',
+        'CREATE INDEX IF NOT EXISTS idx_brands_brand ON brands (brand)',
+        'CREATE INDEX IF NOT EXISTS idx_pots_amp_id ON pots (amp_id)',
+        'CREATE INDEX IF NOT EXISTS idx_tubes_amp_id ON tubes (amp_id)',
+        'CREATE INDEX IF NOT EXISTS idx_transformers_amp_id ON transformers (amp_id)',
+        'CREATE INDEX IF NOT EXISTS idx_transformer_windings_transformer_id ON transformer_windings (transformer_id)',
+        # Covering indexes for the grouped BOM queries. They lead with amp_id, so they
+        # also serve as the amp_id foreign key index for these two tables.
+        'CREATE INDEX IF NOT EXISTS idx_resistors_amp_bom ON resistors (amp_id, resistor, wattage, precision)',
+        'CREATE INDEX IF NOT EXISTS idx_capacitors_amp_bom ON capacitors (amp_id, capacitance, electrolitic, voltage_rating)',
+    ]),
+    (2, 'import manifest', [
+        '''
+        CREATE TABLE IF NOT EXISTS import_manifest (
+            path TEXT PRIMARY KEY,        -- relative to the parts/ root
+            table_name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            imported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Row ids each source file produced, so edits and removals can delete stale rows
+        '''
+        CREATE TABLE IF NOT EXISTS import_manifest_rows (
+            path TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            PRIMARY KEY (path, row_id)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (3, 'full-text part search', _fts_statements()),
+    (4, 'indexes for parametric value search', [
+        'CREATE INDEX IF NOT EXISTS idx_resistors_resistor ON resistors (resistor)',
+        'CREATE INDEX IF NOT EXISTS idx_capacitors_capacitance ON capacitors (capacitance, voltage_rating)',
+        'CREATE INDEX IF NOT EXISTS idx_capacitors_voltage_rating ON capacitors (voltage_rating)',
+        'CREATE INDEX IF NOT EXISTS idx_pots_resistor ON pots (resistor)',
+    ]),
+    # Numeric forms of textual specs, filled by the importer (see normalize.NORMALIZERS)
+    (5, 'normalized numeric spec columns', [
+        'ALTER TABLE transformer_windings ADD COLUMN volts_nominal REAL',
+        'ALTER TABLE transformer_windings ADD COLUMN volts_tap REAL',
+        'ALTER TABLE transformer_windings ADD COLUMN center_tapped INTEGER',
+        'ALTER TABLE capacitors ADD COLUMN capacitance_pf INTEGER',
+        'ALTER TABLE resistors ADD COLUMN precision_value REAL',
+        'ALTER TABLE pots ADD COLUMN precision_value REAL',
+        normalize.backfill,
+        'CREATE INDEX IF NOT EXISTS idx_transformer_windings_volts ON transformer_windings (volts_nominal, center_tapped)',
+        'CREATE INDEX IF NOT EXISTS idx_capacitors_capacitance_pf ON capacitors (capacitance_pf, voltage_rating)',
+    ]),
+    # Per-amp stats and grouped BOMs, refreshed by the importer for the amps it changes (see summaries.py)
+    (6, 'materialized amp summaries', [
+        'CREATE TABLE IF NOT EXISTS amp_summary_dirty (amp_id INTEGER PRIMARY KEY)',
+        '''
+        CREATE TABLE IF NOT EXISTS amp_part_summary (
+            amp_id INTEGER PRIMARY KEY,
+            resistor_count INTEGER NOT NULL,
+            capacitor_count INTEGER NOT NULL,
+            electrolytic_count INTEGER NOT NULL,
+            pot_count INTEGER NOT NULL,
+            tube_count INTEGER NOT NULL,
+            transformer_count INTEGER NOT NULL,
+            tube_complement TEXT            -- e.g. '2x 12AX7, 1x 6V6GT'
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS amp_resistor_groups (
+            amp_id INTEGER NOT NULL,
+            resistor INTEGER,
+            wattage REAL,
+            precision TEXT,
+            resistor_count INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS amp_capacitor_groups (
+            amp_id INTEGER NOT NULL,
+            id INTEGER,                     -- lowest capacitor id in the group
+            capacitance REAL,
+            electrolitic INTEGER,
+            voltage_rating REAL,
+            cap_count INTEGER NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_amp_resistor_groups ON amp_resistor_groups (amp_id, resistor_count DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_amp_capacitor_groups ON amp_capacitor_groups (amp_id, cap_count DESC)',
+        summaries.refresh_all,
+    ]),
+    # Lets the importer's ownership check look up the few ids it loaded instead of scanning every file
+    (7, 'manifest row id index', [
+        'CREATE INDEX IF NOT EXISTS idx_import_manifest_rows_row_id ON import_manifest_rows (row_id)',
+    ]),
+]
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0]
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """
+    Returns the highest migration version applied to the database, or 0 if none.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_migrations').fetchone()
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Applies every pending migration, each in its own transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connection to a database that already has the base schema.
+
+    Returns:
+        int: The schema version after migrating.
+    """
+    current = get_version(conn)
+    conn.commit()
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+
+        try:
+            conn.execute('BEGIN')
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(
+                'INSERT INTO schema_migrations (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        current = version
+
+    return current
@@ -0,0 +1,123 @@
+import re
+import sqlite3
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# "120V", "6.3Vct", "650/550Vct", "120/240 V CT"
+_VOLTS = re.compile(r'^\s*(\d+(?:\.\d+)?(?:\s*/\s*\d+(?:\.\d+)?)*)\s*V?\s*(CT)?\s*$', re.IGNORECASE)
+
+
+class NormalizationError(ValueError):
+    """
+    Raised when a textual spec can't be turned into its numeric columns.
+    """
+
+
+def parse_volts(volts: str) -> Tuple[float, Optional[float], int]:
+    """
+    Parses a winding voltage such as '650/550Vct'.
+
+    Args:
+        volts (str): Voltage as written on the schematic.
+
+    Returns:
+        tuple: Nominal (first listed) volts, the secondary tap volts (last listed, None for a
+        single voltage) and 1 when the winding is center tapped, else 0.
+    """
+    match = _VOLTS.match(str(volts))
+    if not match:
+        raise NormalizationError(f'cannot parse volts {volts!r}')
+    taps = [float(tap) for tap in match.group(1).split('/')]
+    return taps[0], taps[-1] if len(taps) > 1 else None, int(match.group(2) is not None)
+
+
+def to_picofarads(capacitance) -> int:
+    """
+    Converts a capacitance in microfarads to whole picofarads.
+    """
+    try:
+        return round(float(capacitance) * 1_000_000)
+    except (TypeError, ValueError):
+        raise NormalizationError(f'cannot parse capacitance {capacitance!r}') from None
+
+
+def parse_precision(precision) -> float:
+    try:
+        return float(str(precision).strip().lstrip('±'))
+    except ValueError:
+        raise NormalizationError(f'cannot parse precision {precision!r}') from None
+
+
+# Numeric columns derived at import time: table -> (source column, derived columns, parser).
+# The parser returns one value per derived column; NULL sources give NULL columns.
+NORMALIZERS: Dict[str, Tuple[str, Tuple[str, ...], Callable]] = {
+    'transformer_windings': ('volts', ('volts_nominal', 'volts_tap', 'center_tapped'), parse_volts),
+    'capacitors': ('capacitance', ('capacitance_pf',), lambda value: (to_picofarads(value),)),
+    'resistors': ('precision', ('precision_value',), lambda value: (parse_precision(value),)),
+    'pots': ('precision', ('precision_value',), lambda value: (parse_precision(value),)),
+}
+
+
+def normalize_rows(
+    table_name: str,
+    columns: List[str],
+    rows: Iterable[Tuple],
+    rejected: List[str],
+    source: str = '',
+) -> Tuple[List[str], Iterator[Tuple]]:
+    """
+    Appends the derived numeric columns of ``table_name`` to every row.
+
+    Rows whose spec can't be parsed are left out, and a message naming the
+    source, the row number and the bad value is appended to ``rejected``.
+    Tables without a normalizer, and files that already carry the derived
+    columns, pass through unchanged.
+
+    Args:
+        table_name (str): Target table.
+        columns (list): Column names of ``rows``.
+        rows (iterable): Coerced row tuples.
+        rejected (list): Receives one message per rejected row.
+        source (str): File name used in the messages.
+
+    Returns:
+        tuple: The extended column names and an iterator of extended rows.
+    """
+    normalizer = NORMALIZERS.get(table_name)
+    if normalizer is None or normalizer[0] not in columns or any(name in columns for name in normalizer[1]):
+        return columns, iter(rows)
+
+    source_column, derived, parse = normalizer
+    position = columns.index(source_column)
+    width = len(columns)
+    empty = (None,) * len(derived)
+
+    def extended() -> Iterator[Tuple]:
+        for number, row in enumerate(rows, 1):
+            if len(row) != width:
+                yield row  # malformed row; let SQLite report it
+                continue
+            value = row[position]
+            if value is None or value == '':
+                yield row + empty
+                continue
+            try:
+                yield row + parse(value)
+            except NormalizationError as e:
+                rejected.append(f'{source}: row {number}: {e}')
+
+    return columns + list(derived), extended()
+
+
+def backfill(conn: sqlite3.Connection) -> None:
+    """
+    Fills the derived columns of rows imported before they existed. Unparseable specs stay NULL.
+    """
+    for table_name, (source_column, derived, parse) in NORMALIZERS.items():
+        updates = []
+        for row_id, value in conn.execute(f'SELECT id, {source_column} FROM {table_name} WHERE {source_column} IS NOT NULL'):
+            try:
+                updates.append(parse(value) + (row_id,))
+            except NormalizationError:
+                continue
+        assignments = ', '.join(f'{name} = ?' for name in derived)
+        conn.executemany(f'UPDATE {table_name} SET {assignments} WHERE id = ?', updates)
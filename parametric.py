@@ -0,0 +1,277 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cache
+import queries
+import records
+
+# Searchable numeric columns: table -> (record class, selected columns, searchable columns)
+PARAMETRIC_TABLES = {
+    'resistors': (
+        records.Resistor,
+        'p.id, p.resistor, p.wattage, p.precision, p.amp_id, a.amp',
+        ('resistor',),
+    ),
+    'capacitors': (
+        records.Capacitor,
+        'p.id, p.capacitance, p.electrolitic, p.voltage_rating, p.amp_id, a.amp',
+        ('capacitance', 'capacitance_pf', 'voltage_rating'),
+    ),
+    'pots': (
+        records.Pot,
+        'p.id, p.resistor, p.wattage, p.precision, p.taper, p.amp_id, a.amp',
+        ('resistor',),
+    ),
+}
+
+
+def _check(table: str, column: str) -> None:
+    if table not in PARAMETRIC_TABLES or column not in PARAMETRIC_TABLES[table][2]:
+        raise ValueError(f'{table}.{column} is not a searchable numeric column')
+
+
+def _bounds(table: str, bounds: Dict[str, Tuple[Optional[float], Optional[float]]]) -> Tuple[List[str], list]:
+    """
+    Turns ``{column: (low, high)}`` into WHERE terms and their parameters; None leaves a side open.
+    """
+    where, params = [], []
+    for name, (lower, upper) in bounds.items():
+        _check(table, name)
+        if lower is not None:
+            where.append(f'p.{name} >= ?')
+            params.append(lower)
+        if upper is not None:
+            where.append(f'p.{name} <= ?')
+            params.append(upper)
+    return where, params
+
+
+def _select(table: str, where: List[str], order: str, limit: Optional[int]) -> str:
+    query = (
+        f'SELECT {PARAMETRIC_TABLES[table][1]} FROM {table} p '
+        f'LEFT JOIN amps a ON a.id = p.amp_id '
+    )
+    if where:
+        query += 'WHERE ' + ' AND '.join(where) + ' '
+    query += f'ORDER BY {order}'
+    if limit is not None:
+        query += ' LIMIT ?'
+    return query
+
+
+def _fetch(table: str, query: str, params: list) -> List[records.Record]:
+    with queries.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = records.row_factory(PARAMETRIC_TABLES[table][0])
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+def find_in_range(
+    table: str,
+    column: str,
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+    filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    limit: Optional[int] = None,
+) -> List[records.Record]:
+    """
+    Returns parts across all amps whose ``column`` lies in [low, high], ordered by that column.
+
+    Args:
+        table (str): 'resistors', 'capacitors' or 'pots'.
+        column (str): Numeric column to search, e.g. 'resistor' or 'capacitance'.
+        low (float): Inclusive lower bound, unbounded when None.
+        high (float): Inclusive upper bound, unbounded when None.
+        filters (dict): Extra ``{column: (low, high)}`` bounds, e.g. ``{'voltage_rating': (25, None)}``.
+        limit (int): Maximum number of parts.
+
+    Returns:
+        list: Part records, each with the owning ``amp`` name.
+    """
+    where, params = _bounds(table, {column: (low, high), **(filters or {})})
+    if limit is not None:
+        params.append(limit)
+    return _fetch(table, _select(table, where, f'p.{column}, p.id', limit), params)
+
+
+def find_within_tolerance(
+    table: str,
+    column: str,
+    value: float,
+    tolerance: float = 0.05,
+    filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    limit: Optional[int] = None,
+) -> List[records.Record]:
+    """
+    Returns parts whose ``column`` is within ``value`` ± ``tolerance`` (a fraction, 0.05 is ±5%).
+    """
+    return find_in_range(
+        table, column, value * (1 - tolerance), value * (1 + tolerance), filters, limit
+    )
+
+
+def find_nearest(
+    table: str,
+    column: str,
+    value: float,
+    k: int = 10,
+    filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+) -> List[records.Record]:
+    """
+    Returns the ``k`` parts whose ``column`` is closest to ``value``, closest first.
+
+    Two index range scans (the k values at or above ``value`` and the k below)
+    bound the work to 2k rows whatever the size of the table.
+    """
+    above = find_in_range(table, column, value, None, filters, k)
+
+    # Walk downwards from value for the lower half
+    _check(table, column)
+    where, params = _bounds(table, filters or {})
+    where.append(f'p.{column} < ?')
+    below = _fetch(table, _select(table, where, f'p.{column} DESC, p.id', k), params + [value, k])
+
+    candidates = above + below
+    candidates.sort(key=lambda part: abs(part.raw(column) - value))
+    return candidates[:k]
+
+
+def find_resistors(min_ohms: Optional[float] = None, max_ohms: Optional[float] = None, limit: Optional[int] = None):
+    return find_in_range('resistors', 'resistor', min_ohms, max_ohms, limit=limit)
+
+
+def find_resistors_near(ohms: float, tolerance: float = 0.05, limit: Optional[int] = None):
+    """
+    Example:
+        find_resistors_near(68_000, 0.05)  # every 64.6k-71.4k resistor in the catalog
+    """
+    return find_within_tolerance('resistors', 'resistor', ohms, tolerance, limit=limit)
+
+
+def nearest_resistors(ohms: float, k: int = 10):
+    return find_nearest('resistors', 'resistor', ohms, k)
+
+
+def find_capacitors(
+    min_capacitance: Optional[float] = None,
+    max_capacitance: Optional[float] = None,
+    min_voltage: Optional[float] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Example:
+        find_capacitors(min_capacitance=10, min_voltage=25)  # >= 10µF rated >= 25V
+    """
+    filters = {'voltage_rating': (min_voltage, None)} if min_voltage is not None else None
+    return find_in_range('capacitors', 'capacitance', min_capacitance, max_capacitance, filters, limit)
+
+
+def find_capacitors_near(
+    capacitance: float,
+    tolerance: float = 0.1,
+    min_voltage: Optional[float] = None,
+    limit: Optional[int] = None,
+):
+    filters = {'voltage_rating': (min_voltage, None)} if min_voltage is not None else None
+    return find_within_tolerance('capacitors', 'capacitance', capacitance, tolerance, filters, limit)
+
+
+def nearest_capacitors(capacitance: float, k: int = 10, min_voltage: Optional[float] = None):
+    filters = {'voltage_rating': (min_voltage, None)} if min_voltage is not None else None
+    return find_nearest('capacitors', 'capacitance', capacitance, k, filters)
+
+
+def find_pots(min_ohms: Optional[float] = None, max_ohms: Optional[float] = None, limit: Optional[int] = None):
+    return find_in_range('pots', 'resistor', min_ohms, max_ohms, limit=limit)
+
+
+def find_pots_near(ohms: float, tolerance: float = 0.2, limit: Optional[int] = None):
+    return find_within_tolerance('pots', 'resistor', ohms, tolerance, limit=limit)
+
+
+def nearest_pots(ohms: float, k: int = 10):
+    return find_nearest('pots', 'resistor', ohms, k)
+
+
+class ValueIndex:
+    """
+    A sorted in-memory copy of one numeric column, searched with ``bisect``.
+
+    Lookups return part ids without querying the part tables, which keeps
+    repeated substitute searches well under a millisecond. The arrays are
+    rebuilt from the value index the first time they are used after the
+    cache generation changes, i.e. after an import.
+
+    Example:
+        index = ValueIndex('resistors', 'resistor')
+        ids = index.ids_in_range(64_600, 71_400)
+        parts = index.fetch(ids)
+    """
+
+    def __init__(self, table: str, column: str):
+        _check(table, column)
+        self.table = table
+        self.column = column
+        self._values: List[float] = []
+        self._ids: List[int] = []
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        generation = cache.get_cache().generation()
+        if generation == self._generation:
+            return
+        with self._lock:
+            if generation == self._generation:
+                return
+            with queries.get_db_connection() as conn:
+                rows = conn.execute(f'''
+                SELECT {self.column}, id
+                FROM {self.table}
+                WHERE {self.column} IS NOT NULL
+                ORDER BY {self.column}, id
+                ''').fetchall()
+            self._values = [row[0] for row in rows]
+            self._ids = [row[1] for row in rows]
+            self._generation = generation
+
+    def ids_in_range(self, low: float, high: float) -> List[int]:
+        self._refresh()
+        start = bisect.bisect_left(self._values, low)
+        end = bisect.bisect_right(self._values, high)
+        return self._ids[start:end]
+
+    def ids_within_tolerance(self, value: float, tolerance: float = 0.05) -> List[int]:
+        return self.ids_in_range(value * (1 - tolerance), value * (1 + tolerance))
+
+    def nearest_ids(self, value: float, k: int = 10) -> List[int]:
+        self._refresh()
+        values, ids = self._values, self._ids
+        right = bisect.bisect_left(values, value)
+        left = right - 1
+        nearest = []
+        while len(nearest) < k and (left >= 0 or right < len(values)):
+            if right >= len(values) or (left >= 0 and value - values[left] <= values[right] - value):
+                nearest.append(ids[left])
+                left -= 1
+            else:
+                nearest.append(ids[right])
+                right += 1
+        return nearest
+
+    def fetch(self, ids: List[int]) -> List[records.Record]:
+        """
+        Loads the part records for ``ids``, keeping their order.
+        """
+        if not ids:
+            return []
+        parts = {}
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ', '.join(['?' for _ in chunk])
+            for part in _fetch(self.table, _select(self.table, [f'p.id IN ({placeholders})'], 'p.id', None), chunk):
+                parts[part['id']] = part
+        return [parts[part_id] for part_id in ids if part_id in parts]
@@ -1,98 +1,168 @@
 import json
 import sqlite3
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Type, Union
 
-import utilities
+import cache
+import connection
+import records
 
 
 def get_db_connection():
-    return sqlite3.connect('amp_parts.db')
+    return connection.connection()
 
-def get_all_resistors_by_brand(brand_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT r.id, r.resistor, r.wattage, r.precision, r.amp_id
-    FROM resistors r
-    JOIN amps a ON r.amp_id = a.id
-    JOIN brands b ON a.brand_id = b.id
-    WHERE b.brand = ?
-    '''
-    
-    cursor.execute(query, (brand_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return [
-        {
-            **resistor,
-            resistor: utilities.convert_resistor_value(resistor['resistor'])
-        }
-        for resistor in results
-    ]
-
-def get_all_capacitors_by_brand(brand_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT c.id, c.capacitance, c.electrolitic, c.voltage_rating, c.amp_id
-    FROM capacitors c
-    JOIN amps a ON c.amp_id = a.id
-    JOIN brands b ON a.brand_id = b.id
-    WHERE b.brand = ?
-    '''
-    
-    cursor.execute(query, (brand_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return [
-        {
-            **cap,
-            'capacitance': utilities.convert_capacitor_value(cap['capacitance'])
-        }
-        for cap in results
-    ]
-
-def get_all_pots_by_brand(brand_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT p.id, p.resistor, p.wattage, p.precision, p.taper, p.amp_id
-    FROM pots p
-    JOIN amps a ON p.amp_id = a.id
-    JOIN brands b ON a.brand_id = b.id
-    WHERE b.brand = ?
-    '''
-    
-    cursor.execute(query, (brand_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return [
-        {
-            **resistor,
-            resistor: utilities.convert_resistor_value(resistor['resistor'])
-        }
-        for resistor in results
-    ]
-
-def get_all_parts_by_brand(brand_name: str) -> List[Dict]:
-    resistors = get_all_resistors_by_brand(brand_name)
-    capacitors = get_all_capacitors_by_brand(brand_name)
-    pots = get_all_pots_by_brand(brand_name)
+# Default number of rows pulled per fetchmany() by the iter_* functions
+BATCH_SIZE = 500
+
+# Part tables that can be listed brand-wide: table -> (columns, record class)
+_LISTINGS = {
+    'resistors': (('id', 'resistor', 'wattage', 'precision', 'amp_id'), records.Resistor),
+    'capacitors': (('id', 'capacitance', 'electrolitic', 'voltage_rating', 'amp_id'), records.Capacitor),
+    'pots': (('id', 'resistor', 'wattage', 'precision', 'taper', 'amp_id'), records.Pot),
+}
+
+def _listing_query(table: str, brand_name: Optional[str], limit: Optional[int]) -> str:
+    """
+    Builds a keyset (``id > ?``) listing of a part table, optionally filtered by brand.
+
+    The CROSS JOIN keeps the part table as the outer loop, so SQLite walks it in
+    rowid order and can stop after ``limit`` rows instead of sorting the whole brand.
+    """
+    columns = ', '.join(f'p.{column}' for column in _LISTINGS[table][0])
+    query = f'SELECT {columns} FROM {table} p '
+    if brand_name is not None:
+        query += '''
+        CROSS JOIN amps a ON p.amp_id = a.id
+        JOIN brands b ON a.brand_id = b.id
+        WHERE p.id > ? AND b.brand = ?
+        '''
+    else:
+        query += 'WHERE p.id > ? '
+    query += 'ORDER BY p.id'
+    if limit is not None:
+        query += ' LIMIT ?'
+    return query
+
+def _listing_params(brand_name: Optional[str], after_id: int, limit: Optional[int]) -> tuple:
+    params = (after_id,) if brand_name is None else (after_id, brand_name)
+    return params if limit is None else params + (limit,)
+
+def iter_parts(
+    table: str,
+    brand_name: Optional[str] = None,
+    after_id: int = 0,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[records.Record]:
+    """
+    Lazily yields formatted rows of a part table in id order.
+
+    Rows are pulled ``batch_size`` at a time with ``fetchmany`` and converted one
+    by one, so memory stays constant however large the listing is. The pooled
+    connection is held until the generator is exhausted or closed.
+
+    Args:
+        table (str): 'resistors', 'capacitors' or 'pots'.
+        brand_name (str): Only list parts of this brand's amps; all parts when None.
+        after_id (int): Start after this part id.
+        batch_size (int): Rows fetched per round trip.
+
+    Yields:
+        Record: One part, with its value formatted like the get_all_* functions.
+    """
+    if batch_size < 1:
+        raise ValueError(f'batch_size must be at least 1, got {batch_size}')
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = records.row_factory(_LISTINGS[table][1])
+        cursor.execute(
+            _listing_query(table, brand_name, None),
+            _listing_params(brand_name, after_id, None)
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+def get_parts_page(
+    table: str,
+    brand_name: Optional[str] = None,
+    after_id: int = 0,
+    limit: int = 100,
+) -> Dict:
+    """
+    Returns one keyset page of a part table.
+
+    Pass the returned ``next_after_id`` back as ``after_id`` to get the next page;
+    it is None once the listing is exhausted. Every page costs the same however
+    deep into the table it is.
+
+    Args:
+        table (str): 'resistors', 'capacitors' or 'pots'.
+        brand_name (str): Only list parts of this brand's amps; all parts when None.
+        after_id (int): Id of the last part of the previous page, 0 for the first page.
+        limit (int): Maximum number of parts on the page.
+
+    Returns:
+        dict: The page's ``items`` and the ``next_after_id`` cursor.
+    """
+    if limit < 1:
+        raise ValueError(f'limit must be at least 1, got {limit}')
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = records.row_factory(_LISTINGS[table][1])
+        cursor.execute(
+            _listing_query(table, brand_name, limit),
+            _listing_params(brand_name, after_id, limit)
+        )
+        items = cursor.fetchall()
+
+    return {
+        'items': items,
+        'next_after_id': items[-1]['id'] if len(items) == limit else None,
+    }
+
+def iter_resistors_by_brand(brand_name: str, batch_size: int = BATCH_SIZE) -> Iterator[records.Resistor]:
+    return iter_parts('resistors', brand_name, batch_size=batch_size)
+
+def iter_capacitors_by_brand(brand_name: str, batch_size: int = BATCH_SIZE) -> Iterator[records.Capacitor]:
+    return iter_parts('capacitors', brand_name, batch_size=batch_size)
+
+def iter_pots_by_brand(brand_name: str, batch_size: int = BATCH_SIZE) -> Iterator[records.Pot]:
+    return iter_parts('pots', brand_name, batch_size=batch_size)
+
+def get_resistors_page(brand_name: Optional[str] = None, after_id: int = 0, limit: int = 100) -> Dict:
+    return get_parts_page('resistors', brand_name, after_id, limit)
+
+def get_capacitors_page(brand_name: Optional[str] = None, after_id: int = 0, limit: int = 100) -> Dict:
+    return get_parts_page('capacitors', brand_name, after_id, limit)
+
+def get_pots_page(brand_name: Optional[str] = None, after_id: int = 0, limit: int = 100) -> Dict:
+    return get_parts_page('pots', brand_name, after_id, limit)
+
+@cache.cached
+def get_all_resistors_by_brand(brand_name: str) -> List[records.Resistor]:
+    return list(iter_resistors_by_brand(brand_name))
+
+@cache.cached
+def get_all_capacitors_by_brand(brand_name: str) -> List[records.Capacitor]:
+    return list(iter_capacitors_by_brand(brand_name))
+
+@cache.cached
+def get_all_pots_by_brand(brand_name: str) -> List[records.Pot]:
+    return list(iter_pots_by_brand(brand_name))
+
+@cache.cached
+def get_all_parts_by_brand(brand_name: str) -> Dict[str, List[records.Record]]:
+    # Hold one connection so the per-category queries below reuse it
+    with get_db_connection():
+        resistors = get_all_resistors_by_brand(brand_name)
+        capacitors = get_all_capacitors_by_brand(brand_name)
+        pots = get_all_pots_by_brand(brand_name)
     
     # Combine all parts into a single list
     all_parts = {
@@ -103,300 +173,466 @@ def get_all_parts_by_brand(brand_name: str) -> List[Dict]:
     
     return all_parts
 
+@cache.cached
 def get_all_brands() -> List[str]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = 'SELECT brand FROM brands'
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    
-    brands = [row[0] for row in rows]
-    
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        query = 'SELECT brand FROM brands'
+
+        cursor.execute(query)
+        rows = cursor.fetchall()
+
+        brands = [row[0] for row in rows]
+
     return brands
 
-def get_all_resistors_by_amp_grouped(amp_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT r.resistor, r.wattage, r.precision, COUNT(r.id) AS resistor_count
-    FROM resistors r
-    JOIN amps a ON r.amp_id = a.id
-    WHERE a.amp = ?
-    GROUP BY r.resistor, r.wattage, r.precision
-    ORDER BY resistor_count DESC
-    '''
-    
-    cursor.execute(query, (amp_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return [
-        {
-            **resistor,  # Merge the resistor dictionary
-            'resistor': utilities.convert_resistor_value(resistor['resistor'])  # Convert and replace resistor value
-        }
-        for resistor in results
-    ]
-
-def get_all_resistors_by_amp(amp_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT r.id, r.resistor, r.wattage, r.precision, r.amp_id
-    FROM resistors r
-    JOIN amps a ON r.amp_id = a.id
-    WHERE a.amp = ?
-    ORDER BY r.resistor DESC
-    '''
-    
-    cursor.execute(query, (amp_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return [
-        {
-            **resistor,  # Merge the resistor dictionary
-            'resistor': utilities.convert_resistor_value(resistor['resistor'])  # Convert and replace resistor value
-        }
-        for resistor in results
-    ]
-
-def get_all_capacitors_by_amp_grouped(amp_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT c.id, c.capacitance, c.electrolitic, c.voltage_rating, COUNT(c.id) AS cap_count
-    FROM capacitors c
-    JOIN amps a ON c.amp_id = a.id
-    WHERE a.amp = ?
-    GROUP BY c.capacitance, c.electrolitic, c.voltage_rating
-    ORDER BY cap_count DESC
-    '''
-    
-    cursor.execute(query, (amp_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
+@cache.cached
+def get_all_resistors_by_amp_grouped(amp_name: str) -> List[records.Resistor]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-    # return results
-    return [
-        {
-            **cap,
-            'capacitance': utilities.convert_capacitor_value(cap['capacitance'])
-        }
-        for cap in results
-    ]
+        query = '''
+        SELECT g.resistor, g.wattage, g.precision, g.resistor_count
+        FROM amp_resistor_groups g
+        JOIN amps a ON g.amp_id = a.id
+        WHERE a.amp = ?
+        ORDER BY g.resistor_count DESC
+        '''
 
+        cursor.row_factory = records.row_factory(records.Resistor)
+        cursor.execute(query, (amp_name,))
+        return cursor.fetchall()
 
-def get_all_capacitors_by_amp(amp_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT c.id, c.capacitance, c.electrolitic, c.voltage_rating, c.amp_id
-    FROM capacitors c
-    JOIN amps a ON c.amp_id = a.id
-    WHERE a.amp = ?
-    ORDER BY c.capacitance ASC
-    '''
-    
-    cursor.execute(query, (amp_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return [
-        {
-            **cap,
-            'capacitance': utilities.convert_capacitor_value(cap['capacitance'])
-        }
-        for cap in results
-    ]
-
-def get_all_pots_by_amp(amp_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT p.id, p.resistor, p.wattage, p.precision, p.taper, p.amp_id
-    FROM pots p
-    JOIN amps a ON p.amp_id = a.id
-    WHERE a.amp = ?
-    ORDER BY p.resistor ASC
-    '''
-    
-    cursor.execute(query, (amp_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return [
-        {
-            **pot,
-            'resistor': utilities.convert_resistor_value(pot['resistor'])
-        }
-        for pot in results
-    ]
-
-def get_all_tubes_by_amp(amp_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get the amp_id for the given amp_name
-    cursor.execute('''
-    SELECT id
-    FROM amps
-    WHERE amp = ?
-    ''', (amp_name,))
-    amp_id_row = cursor.fetchone()
-    
-    if not amp_id_row:
-        conn.close()
-        return []  # No amp found with the given name
-    
-    amp_id = amp_id_row[0]
-    
-    # Get all tubes associated with the amp_id
-    cursor.execute('''
-    SELECT tubes.id, tubes.name, tube_types.type, tube_functionalities.tube_functionality,
-           tubes.plate_voltage, tubes.plate_current, tubes.cathode_current, tubes.grid_current,
-           tubes.dissipation, tubes.bias, bias_types.type AS bias_type, tubes.datasheet_url
-    FROM tubes
-    LEFT JOIN tube_functionalities ON tubes.id = tube_functionalities.id
-    LEFT JOIN bias_types ON tubes.bias_type_id = bias_types.id
-    LEFT JOIN tube_types ON tubes.tube_type_id = tube_types.id
-    WHERE tubes.amp_id = ?
-    ''', (amp_id,))
-    
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    tubes = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-    return tubes
-
-def get_all_transformers_by_amp(amp_name: str) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    query = """
-        SELECT
-            t.id AS transformer_id,
-            a.amp,
-            t.part_number,
-            t.wattage,
-            tt.type AS transformer_type,
-            ct.type AS core_type,
-            GROUP_CONCAT(
-                json_object(
-                    'id', tw.id,
-                    'winding_type', wt.type,
-                    'volts', tw.volts,
-                    'amps', tw.amps
-                )
-            ) AS windings
-        FROM
-            transformers t
-        LEFT JOIN
-            transformer_types tt ON t.transformer_type_id = tt.id
-        LEFT JOIN
-            core_types ct ON t.core_type_id = ct.id
-        LEFT JOIN
-            transformer_windings tw ON t.id = tw.transformer_id
-        LEFT JOIN
-            winding_types wt ON tw.winding_type_id = wt.id
-        JOIN amps a ON t.amp_id = a.id
-            WHERE a.amp = ?
-        GROUP BY
-            t.id;
+@cache.cached
+def get_all_resistors_by_amp(amp_name: str) -> List[records.Resistor]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        query = '''
+        SELECT r.id, r.resistor, r.wattage, r.precision, r.amp_id
+        FROM resistors r
+        JOIN amps a ON r.amp_id = a.id
+        WHERE a.amp = ?
+        ORDER BY r.resistor DESC
+        '''
+
+        cursor.row_factory = records.row_factory(records.Resistor)
+        cursor.execute(query, (amp_name,))
+        return cursor.fetchall()
+
+@cache.cached
+def get_all_capacitors_by_amp_grouped(amp_name: str) -> List[records.Capacitor]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        query = '''
+        SELECT g.id, g.capacitance, g.electrolitic, g.voltage_rating, g.cap_count
+        FROM amp_capacitor_groups g
+        JOIN amps a ON g.amp_id = a.id
+        WHERE a.amp = ?
+        ORDER BY g.cap_count DESC
+        '''
+
+        cursor.row_factory = records.row_factory(records.Capacitor)
+        cursor.execute(query, (amp_name,))
+        return cursor.fetchall()
+
+
+@cache.cached
+def get_all_capacitors_by_amp(amp_name: str) -> List[records.Capacitor]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        query = '''
+        SELECT c.id, c.capacitance, c.electrolitic, c.voltage_rating, c.amp_id
+        FROM capacitors c
+        JOIN amps a ON c.amp_id = a.id
+        WHERE a.amp = ?
+        ORDER BY c.capacitance ASC
+        '''
+
+        cursor.row_factory = records.row_factory(records.Capacitor)
+        cursor.execute(query, (amp_name,))
+        return cursor.fetchall()
 
+@cache.cached
+def get_all_pots_by_amp(amp_name: str) -> List[records.Pot]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        query = '''
+        SELECT p.id, p.resistor, p.wattage, p.precision, p.taper, p.amp_id
+        FROM pots p
+        JOIN amps a ON p.amp_id = a.id
+        WHERE a.amp = ?
+        ORDER BY p.resistor ASC
+        '''
+
+        cursor.row_factory = records.row_factory(records.Pot)
+        cursor.execute(query, (amp_name,))
+        return cursor.fetchall()
+
+# Shared by get_all_tubes_by_amp and get_amp_bom so both resolve tube functionality the same way
+_TUBES_BY_AMP = '''
+SELECT tubes.id, tubes.name, tube_types.type, tube_functionalities.tube_functionality,
+       tubes.plate_voltage, tubes.plate_current, tubes.cathode_current, tubes.grid_current,
+       tubes.dissipation, tubes.bias, bias_types.type AS bias_type, tubes.datasheet_url
+FROM tubes
+LEFT JOIN tube_functionalities ON tubes.tube_functionality_id = tube_functionalities.id
+LEFT JOIN bias_types ON tubes.bias_type_id = bias_types.id
+LEFT JOIN tube_types ON tubes.tube_type_id = tube_types.id
+WHERE tubes.amp_id = ?
+'''
+
+@cache.cached
+def get_all_tubes_by_amp(amp_name: str) -> List[records.Tube]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Get the amp_id for the given amp_name
+        cursor.execute('''
+        SELECT id
+        FROM amps
+        WHERE amp = ?
+        ''', (amp_name,))
+        amp_id_row = cursor.fetchone()
+
+        if not amp_id_row:
+            return []  # No amp found with the given name
+
+        amp_id = amp_id_row[0]
+
+        # Get all tubes associated with the amp_id
+        cursor.row_factory = records.row_factory(records.Tube)
+        cursor.execute(_TUBES_BY_AMP, (amp_id,))
+
+        return cursor.fetchall()
+
+# Amp ids bound per statement when loading transformers, well under SQLite's parameter limit
+TRANSFORMER_CHUNK_SIZE = 500
+
+def _load_transformers(cursor: sqlite3.Cursor, amp_ids: List[int]) -> Dict[int, List[records.Transformer]]:
     """
+    Loads the transformers of ``amp_ids`` with their windings, grouped by amp id.
 
-    cursor.execute(query, (amp_name,))
-    rows = cursor.fetchall()
-    
-    columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in rows]
-    
-    conn.close()
-
-    return [
-        {
-            **transformer,
-            'windings': [
-                {
-                    **winding,
-                    'amps': utilities.convert_current_value(winding['amps'])
-                }
-                for winding in json.loads(f"[{transformer['windings']}]")
-            ]
-        }
-        for transformer in results
-    ]
-
-def get_all_parts_by_amp(amp_name: str) -> Dict[str, List[Dict]]:
-    resistors = get_all_resistors_by_amp(amp_name)
-    capacitors = get_all_capacitors_by_amp(amp_name)
-    pots = get_all_pots_by_amp(amp_name)
-    tubes = get_all_tubes_by_amp(amp_name)
-    
-    all_parts = {
-        'resistors': resistors,
-        'capacitors': capacitors,
-        'pots': pots,
-        'tubes': tubes,
-    }
-    
-    return all_parts
+    Transformers and windings are read with one query each (per chunk of amps)
+    and joined here through a dict keyed on transformer id, so every winding
+    stays a plain row and transformers without windings get an empty list.
+    """
+    transformers: Dict[int, List[records.Transformer]] = {}
+    for start in range(0, len(amp_ids), TRANSFORMER_CHUNK_SIZE):
+        chunk = amp_ids[start:start + TRANSFORMER_CHUNK_SIZE]
+        placeholders = ', '.join(['?' for _ in chunk])
+
+        cursor.row_factory = None
+        cursor.execute(f"""
+            SELECT
+                t.id AS transformer_id,
+                a.amp,
+                t.part_number,
+                t.wattage,
+                tt.type AS transformer_type,
+                ct.type AS core_type,
+                t.amp_id
+            FROM transformers t
+            JOIN amps a ON t.amp_id = a.id
+            LEFT JOIN transformer_types tt ON t.transformer_type_id = tt.id
+            LEFT JOIN core_types ct ON t.core_type_id = ct.id
+            WHERE t.amp_id IN ({placeholders})
+            ORDER BY t.amp_id, t.id
+        """, chunk)
+        rows = cursor.fetchall()
+        if not rows:
+            continue
+
+        # amp_id is only needed for grouping, so the index leaves it out and points windings past the row
+        index = {column[0]: i for i, column in enumerate(cursor.description[:-1])}
+        index['windings'] = len(cursor.description)
+        windings: Dict[int, List[records.Winding]] = {row[0]: [] for row in rows}
+        for row in rows:
+            transformers.setdefault(row[-1], []).append(
+                records.Transformer(index, row + (windings[row[0]],))
+            )
+
+        cursor.execute(f"""
+            SELECT tw.transformer_id, tw.id, wt.type AS winding_type, tw.volts, tw.amps
+            FROM transformer_windings tw
+            LEFT JOIN winding_types wt ON tw.winding_type_id = wt.id
+            WHERE tw.transformer_id IN (
+                SELECT id FROM transformers WHERE amp_id IN ({placeholders})
+            )
+            ORDER BY tw.transformer_id, tw.id
+        """, chunk)
+        winding_index = {'id': 1, 'winding_type': 2, 'volts': 3, 'amps': 4}
+        for row in cursor:
+            windings[row[0]].append(records.Winding(winding_index, row))
+
+    return transformers
+
+@cache.cached
+def get_all_transformers_by_amp(amp_name: str) -> List[records.Transformer]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM amps WHERE amp = ?', (amp_name,))
+        amp_id_row = cursor.fetchone()
+
+        if not amp_id_row:
+            return []  # No amp found with the given name
+
+        return _load_transformers(cursor, [amp_id_row[0]]).get(amp_id_row[0], [])
+
+@cache.cached
+def get_transformers_by_amps(amp_names: Iterable[str]) -> Dict[str, List[records.Transformer]]:
+    """
+    Fetches the transformers, with windings, of many amps in two queries.
+
+    Args:
+        amp_names (list): Amp names; unknown names map to an empty list.
+
+    Returns:
+        dict: Amp name -> list of transformers.
+    """
+    amp_names = list(amp_names)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        amp_ids = {}
+        for start in range(0, len(amp_names), TRANSFORMER_CHUNK_SIZE):
+            chunk = amp_names[start:start + TRANSFORMER_CHUNK_SIZE]
+            placeholders = ', '.join(['?' for _ in chunk])
+            cursor.execute(f'SELECT amp, id FROM amps WHERE amp IN ({placeholders})', chunk)
+            amp_ids.update(cursor.fetchall())
+
+        transformers = _load_transformers(cursor, list(amp_ids.values()))
+
+    return {name: transformers.get(amp_ids.get(name), []) for name in amp_names}
+
+def _fetch_records(cursor: sqlite3.Cursor, cls: Type[records.Record], query: str, params: tuple) -> List[records.Record]:
+    cursor.row_factory = records.row_factory(cls)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+@cache.cached
+def get_amp_bom(amp_name: str) -> Dict[str, List[records.Record]]:
+    """
+    Fetches every part of an amp from one connection and one read transaction.
+
+    The amp name is resolved to its id once, and all categories are read from the
+    same snapshot, so an import running concurrently is either fully visible or
+    not at all.
+
+    Args:
+        amp_name (str): The amp name, e.g. 'Vibro-Champ'.
+
+    Returns:
+        dict: Lists of resistors, capacitors, pots, tubes and transformers (with windings).
+    """
+    bom = {'resistors': [], 'capacitors': [], 'pots': [], 'tubes': [], 'transformers': []}
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Only the outermost caller owns the snapshot
+        owns_transaction = not conn.in_transaction
+        if owns_transaction:
+            cursor.execute('BEGIN')
+        try:
+            cursor.execute('SELECT id FROM amps WHERE amp = ?', (amp_name,))
+            amp_row = cursor.fetchone()
+            if not amp_row:
+                return bom  # No amp found with the given name
 
+            amp_id = amp_row[0]
+
+            bom['resistors'] = _fetch_records(cursor, records.Resistor, '''
+            SELECT id, resistor, wattage, precision, amp_id
+            FROM resistors
+            WHERE amp_id = ?
+            ORDER BY resistor DESC
+            ''', (amp_id,))
+
+            bom['capacitors'] = _fetch_records(cursor, records.Capacitor, '''
+            SELECT id, capacitance, electrolitic, voltage_rating, amp_id
+            FROM capacitors
+            WHERE amp_id = ?
+            ORDER BY capacitance ASC
+            ''', (amp_id,))
+
+            bom['pots'] = _fetch_records(cursor, records.Pot, '''
+            SELECT id, resistor, wattage, precision, taper, amp_id
+            FROM pots
+            WHERE amp_id = ?
+            ORDER BY resistor ASC
+            ''', (amp_id,))
+
+            bom['tubes'] = _fetch_records(cursor, records.Tube, _TUBES_BY_AMP, (amp_id,))
+
+            bom['transformers'] = _load_transformers(cursor, [amp_id]).get(amp_id, [])
+        finally:
+            if owns_transaction:
+                conn.rollback()  # read-only, so this just ends the snapshot
+
+    return bom
+
+@cache.cached
+def get_all_parts_by_amp(amp_name: str) -> Dict[str, List[records.Record]]:
+    return get_amp_bom(amp_name)
+
+@cache.cached
 def get_all_amps() -> List[str]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-    SELECT b.brand, a.id AS amp_id, a.amp
-    FROM amps a
-    JOIN brands b ON a.brand_id = b.id
-    ORDER BY b.brand, a.amp
-    '''
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    
-    # Create a dictionary to group amps by brand
-    amps_by_brand = {}
-    
-    for row in rows:
-        brand = row[0]
-        amp_id = row[1]
-        amp_name = row[2]
-        
-        if brand not in amps_by_brand:
-            amps_by_brand[brand] = []
-        
-        amps_by_brand[brand].append({
-            'id': amp_id,
-            'amp': amp_name
-        })
-    
-    conn.close()
+    """
+    Lists the amps of every brand with their part counts and tube complement.
+
+    The stats come from the ``amp_part_summary`` table the importer maintains,
+    so this is a single indexed read however large the catalog is.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        query = '''
+        SELECT b.brand, a.id AS amp_id, a.amp,
+               s.resistor_count, s.capacitor_count, s.electrolytic_count,
+               s.pot_count, s.tube_count, s.transformer_count, s.tube_complement
+        FROM amps a
+        JOIN brands b ON a.brand_id = b.id
+        LEFT JOIN amp_part_summary s ON s.amp_id = a.id
+        ORDER BY b.brand, a.amp
+        '''
+
+        cursor.execute(query)
+        rows = cursor.fetchall()
+
+        # Create a dictionary to group amps by brand
+        amps_by_brand = {}
+
+        for row in rows:
+            brand = row[0]
+            amp_id = row[1]
+            amp_name = row[2]
+
+            if brand not in amps_by_brand:
+                amps_by_brand[brand] = []
+
+            amps_by_brand[brand].append({
+                'id': amp_id,
+                'amp': amp_name,
+                'resistor_count': row[3] or 0,
+                'capacitor_count': row[4] or 0,
+                'electrolytic_count': row[5] or 0,
+                'pot_count': row[6] or 0,
+                'tube_count': row[7] or 0,
+                'transformer_count': row[8] or 0,
+                'tube_complement': row[9],
+            })
+
     return amps_by_brand
+
+@cache.cached
+def search_parts(term: str, limit: int = 20) -> List[records.SearchHit]:
+    """
+    Full-text search across transformer part numbers, tube names, pot tapers, amps and brands.
+
+    The term is matched as a phrase prefix, so '12AX' finds '12AX7' and 'A 2-35'
+    finds that taper. Hits are ranked by bm25, best first.
+
+    Args:
+        term (str): Text to search for, e.g. '125P1B'.
+        limit (int): Maximum number of hits.
+
+    Returns:
+        list: Hits with the matched ``kind`` ('transformer', 'tube', 'pot', 'amp' or 'brand'),
+        the row's ``id``, the matched ``term``, and the ``amp_id``/``amp`` it belongs to.
+    """
+    term = term.strip()
+    if not term:
+        return []
+
+    # Quote the whole term as one FTS phrase so punctuation can't be read as query syntax
+    match = '"' + term.replace('"', '""') + '"*'
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = records.row_factory(records.SearchHit)
+        cursor.execute('''
+        SELECT f.kind, f.ref_id AS id, f.term, f.amp_id, a.amp, bm25(parts_fts) AS rank
+        FROM parts_fts f
+        LEFT JOIN amps a ON a.id = f.amp_id
+        WHERE parts_fts MATCH ?
+        ORDER BY rank, length(f.term)
+        LIMIT ?
+        ''', (match, limit))
+        return cursor.fetchall()
+
+# Column positions of each category in the consolidated BOM query below
+_CONSOLIDATED_COLUMNS = {
+    'resistors': (records.Resistor, {'resistor': 1, 'wattage': 2, 'precision': 3, 'quantity': 7, 'amp_count': 8}),
+    'capacitors': (records.Capacitor, {'capacitance': 1, 'electrolitic': 4, 'voltage_rating': 5, 'quantity': 7, 'amp_count': 8}),
+    'pots': (records.Pot, {'resistor': 1, 'wattage': 2, 'precision': 3, 'taper': 6, 'quantity': 7, 'amp_count': 8}),
+}
+
+def get_consolidated_bom(build: Union[Dict[str, int], Iterable[str]]) -> Dict[str, List]:
+    """
+    Totals the resistors, capacitors and pots needed to build several amps.
+
+    The build plan is passed as JSON and joined against every part table in a
+    single grouped, read-only query, so planning a run costs one query however
+    many amps it covers.
+
+    Args:
+        build (dict): Amp name -> number of units to build. A plain list of amp names builds one of each.
+
+    Returns:
+        dict: Per category, one entry per unique part spec with the total ``quantity``
+        and the number of amps (``amp_count``) using it, most used first. Names not
+        found in the catalog are listed under ``missing_amps``.
+    """
+    if not isinstance(build, dict):
+        names = list(build)
+        build = {name: names.count(name) for name in names}
+
+    bom = {category: [] for category in _CONSOLIDATED_COLUMNS}
+    bom['missing_amps'] = []
+    if not build:
+        return bom
+
+    # The plan travels as one JSON parameter, so the query stays read-only and never
+    # touches the transaction of the pooled connection, which may have a cursor open.
+    # json_each has no statistics, so CROSS JOIN pins the order: plan -> amp -> that
+    # amp's parts, instead of scanning every part
+    with get_db_connection() as conn:
+        rows = conn.execute('''
+        WITH plan (amp, quantity) AS (SELECT key, value FROM json_each(?))
+        SELECT 'resistors', r.resistor, r.wattage, r.precision, NULL, NULL, NULL,
+               SUM(bp.quantity) AS quantity, COUNT(DISTINCT a.id)
+        FROM plan bp
+        CROSS JOIN amps a ON a.amp = bp.amp
+        CROSS JOIN resistors r ON r.amp_id = a.id
+        GROUP BY r.resistor, r.wattage, r.precision
+        UNION ALL
+        SELECT 'capacitors', c.capacitance, NULL, NULL, c.electrolitic, c.voltage_rating, NULL,
+               SUM(bp.quantity), COUNT(DISTINCT a.id)
+        FROM plan bp
+        CROSS JOIN amps a ON a.amp = bp.amp
+        CROSS JOIN capacitors c ON c.amp_id = a.id
+        GROUP BY c.capacitance, c.electrolitic, c.voltage_rating
+        UNION ALL
+        SELECT 'pots', p.resistor, p.wattage, p.precision, NULL, NULL, p.taper,
+               SUM(bp.quantity), COUNT(DISTINCT a.id)
+        FROM plan bp
+        CROSS JOIN amps a ON a.amp = bp.amp
+        CROSS JOIN pots p ON p.amp_id = a.id
+        GROUP BY p.resistor, p.wattage, p.precision, p.taper
+        UNION ALL
+        SELECT 'missing_amps', bp.amp, NULL, NULL, NULL, NULL, NULL, NULL, NULL
+        FROM plan bp
+        WHERE bp.amp NOT IN (SELECT amp FROM amps)
+        ORDER BY 1, quantity DESC, 2
+        ''', (json.dumps(build),)).fetchall()
+
+    for row in rows:
+        if row[0] == 'missing_amps':
+            bom['missing_amps'].append(row[1])
+            continue
+        cls, index = _CONSOLIDATED_COLUMNS[row[0]]
+        bom[row[0]].append(cls(index, row))
+    return bom
@@ -0,0 +1,223 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import cache
+import connection
+import db
+import instrument
+import queries
+import records
+
+# Request durations kept per route for the latency percentiles
+LATENCY_WINDOW = 2048
+
+# Statements listed under "queries" in /stats, by total time
+QUERY_STATS_TOP = 25
+
+# One encoder for every response; records are expanded only while being written
+_encoder = records.JSONEncoder(ensure_ascii=False)
+
+
+class LatencyStats:
+    """
+    Keeps the most recent request durations per route and reports their percentiles.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, seconds: float) -> None:
+        with self._lock:
+            if route not in self._samples:
+                self._samples[route] = deque(maxlen=self.window)
+                self._counts[route] = 0
+            self._samples[route].append(seconds)
+            self._counts[route] += 1
+
+    def report(self) -> Dict[str, Dict]:
+        with self._lock:
+            snapshot = {route: (sorted(samples), self._counts[route]) for route, samples in self._samples.items()}
+
+        return {
+            route: {
+                'requests': count,
+                'p50_ms': instrument.percentile_ms(samples, 50),
+                'p90_ms': instrument.percentile_ms(samples, 90),
+                'p99_ms': instrument.percentile_ms(samples, 99),
+                'max_ms': round(samples[-1] * 1000, 3),
+            }
+            for route, (samples, count) in snapshot.items()
+        }
+
+
+def _grouped_bom(amp_name: str) -> Dict:
+    return {
+        'resistors': queries.get_all_resistors_by_amp_grouped(amp_name),
+        'capacitors': queries.get_all_capacitors_by_amp_grouped(amp_name),
+    }
+
+
+# Per-amp routes: /amps/<amp>/<name>
+AMP_ROUTES: Dict[str, Callable[[str], object]] = {
+    'bom': queries.get_amp_bom,
+    'grouped': _grouped_bom,
+    'transformers': queries.get_all_transformers_by_amp,
+}
+
+# Catalog-wide routes
+ROUTES: Dict[str, Callable[[], object]] = {
+    '/amps': queries.get_all_amps,
+    '/brands': queries.get_all_brands,
+}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Serves the ``queries`` API as JSON. Set up by ``make_server``.
+    """
+
+    readers: connection.ConnectionPool
+    stats: LatencyStats
+    instance: str
+    quiet = True
+
+    def _resolve(self, path: str) -> Tuple[Optional[str], Optional[Callable[[], object]]]:
+        if path in ROUTES:
+            return path, ROUTES[path]
+        if path == '/stats':
+            return path, lambda: {
+                'latency': self.stats.report(),
+                'cache': cache.get_cache().stats(),
+                'queries': instrument.report(QUERY_STATS_TOP) if self.readers.instrument else None,
+            }
+
+        parts = path.strip('/').split('/')
+        if len(parts) == 3 and parts[0] == 'amps' and parts[2] in AMP_ROUTES:
+            amp_name = unquote(parts[1])
+            return f'/amps/{{amp}}/{parts[2]}', lambda: AMP_ROUTES[parts[2]](amp_name)
+        return None, None
+
+    def _etag(self) -> str:
+        _, imports, data_version, snapshot = cache.get_cache().generation()
+        return f'"{self.instance}-{imports}-{data_version}-{snapshot}"'
+
+    def do_GET(self) -> None:
+        started = time.perf_counter()
+        route, handler = self._resolve(urlsplit(self.path).path.rstrip('/') or '/')
+        if handler is None:
+            self._send(404, {'error': f'Unknown path {self.path}'})
+            return
+
+        connection.bind_thread(self.readers)
+        try:
+            etag = self._etag()
+            if route != '/stats' and self.headers.get('If-None-Match') == etag:
+                self._send(304, None, etag)
+            else:
+                self._send(200, handler(), etag)
+        except Exception as e:
+            self._send(500, {'error': str(e)})
+        finally:
+            connection.bind_thread(None)
+            self.stats.record(route, time.perf_counter() - started)
+
+    def _send(self, status: int, payload, etag: Optional[str] = None) -> None:
+        body = b'' if payload is None else _encoder.encode(payload).encode('utf-8')
+
+        self.send_response(status)
+        if payload is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(
+    host: str = '127.0.0.1',
+    port: int = 8000,
+    workers: int = 8,
+    path: Optional[str] = None,
+    instrumented: bool = False,
+    snapshot: bool = False,
+) -> ThreadingHTTPServer:
+    """
+    Builds a threaded HTTP server over the ``queries`` API.
+
+    The database is switched to WAL once, so imports can commit while requests
+    read. Each request thread borrows one of ``workers`` read-only connections.
+    ETags are tied to the database generation, so clients revalidating with
+    ``If-None-Match`` get ``304 Not Modified`` until the next import.
+
+    Endpoints: /amps, /brands, /amps/<amp>/bom, /amps/<amp>/grouped,
+    /amps/<amp>/transformers and /stats (latency percentiles per route and,
+    when ``instrumented``, per SQL statement).
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind.
+        workers (int): Read-only connections, i.e. requests served concurrently.
+        path (str): Database file; defaults to ``connection.DB_PATH``.
+        instrumented (bool): Record per-statement timings and log plans of slow queries.
+        snapshot (bool): Serve reads from an in-memory copy of the file (``connection.SnapshotPool``),
+            reloaded when an import commits.
+
+    Returns:
+        ThreadingHTTPServer: Call ``serve_forever()`` on it.
+    """
+    path = path or connection.DB_PATH
+    conn = db.open_database(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.close()
+
+    connection.configure(path=path, instrument=instrumented)
+    handler = type('BoundQueryHandler', (QueryHandler,), {
+        'readers': (
+            connection.SnapshotPool(path, size=workers, instrument=instrumented) if snapshot
+            else connection.ConnectionPool(path, size=workers, readonly=True, instrument=instrumented)
+        ),
+        'stats': LatencyStats(),
+        'instance': f'{os.getpid():x}{int(time.time()):x}',
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve the amp parts database as read-only JSON.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--db', default=None, help='database file (default: amp_parts.db)')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    parser.add_argument('--instrument', action='store_true', help='time every SQL statement and log slow query plans')
+    parser.add_argument('--snapshot', action='store_true', help='serve reads from an in-memory copy of the database')
+    args = parser.parse_args()
+
+    if args.instrument:
+        logging.basicConfig(format='%(asctime)s %(name)s %(message)s')
+    server = make_server(args.host, args.port, args.workers, args.db, args.instrument, args.snapshot)
+    server.RequestHandlerClass.quiet = not args.verbose
+    print(f'Serving on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
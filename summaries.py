@@ -0,0 +1,104 @@
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+# Tables whose rows feed an amp's summary -> column holding the amp id
+AMP_COLUMNS: Dict[str, str] = {
+    'amps': 'id',
+    'resistors': 'amp_id',
+    'capacitors': 'amp_id',
+    'pots': 'amp_id',
+    'tubes': 'amp_id',
+    'transformers': 'amp_id',
+}
+
+
+def mark_dirty(conn: sqlite3.Connection, amp_ids: Iterable[int]) -> None:
+    """
+    Queues amps for the next ``refresh``.
+    """
+    conn.executemany(
+        'INSERT OR IGNORE INTO amp_summary_dirty (amp_id) VALUES (?)',
+        [(amp_id,) for amp_id in amp_ids if amp_id is not None]
+    )
+
+
+def refresh(conn: sqlite3.Connection, amp_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Rebuilds the summary and grouped-BOM snapshot rows of dirty amps.
+
+    The importer queues every amp whose parts it inserts, updates or deletes in
+    ``amp_summary_dirty``; this recomputes just those amps with a few set-based
+    statements and clears the queue. It runs inside the load transaction, so
+    readers never see parts and summaries out of step. Code writing part rows
+    directly should call ``mark_dirty`` and ``refresh``, or ``refresh_all``.
+
+    Args:
+        conn (sqlite3.Connection): Writable connection, ideally inside a transaction.
+        amp_ids (iterable): Extra amp ids to refresh; ``refresh_all`` refreshes every amp.
+
+    Returns:
+        int: Number of amps refreshed.
+    """
+    if amp_ids is not None:
+        mark_dirty(conn, amp_ids)
+
+    dirty = conn.execute('SELECT COUNT(*) FROM amp_summary_dirty').fetchone()[0]
+    if not dirty:
+        return 0
+
+    for table in ('amp_part_summary', 'amp_resistor_groups', 'amp_capacitor_groups'):
+        conn.execute(f'DELETE FROM {table} WHERE amp_id IN (SELECT amp_id FROM amp_summary_dirty)')
+
+    conn.execute('''
+    INSERT INTO amp_part_summary (
+        amp_id, resistor_count, capacitor_count, electrolytic_count,
+        pot_count, tube_count, transformer_count, tube_complement
+    )
+    SELECT
+        a.id,
+        (SELECT COUNT(*) FROM resistors WHERE amp_id = a.id),
+        (SELECT COUNT(*) FROM capacitors WHERE amp_id = a.id),
+        (SELECT COUNT(*) FROM capacitors WHERE amp_id = a.id AND electrolitic = 1),
+        (SELECT COUNT(*) FROM pots WHERE amp_id = a.id),
+        (SELECT COUNT(*) FROM tubes WHERE amp_id = a.id),
+        (SELECT COUNT(*) FROM transformers WHERE amp_id = a.id),
+        (
+            SELECT GROUP_CONCAT(tube_count || 'x ' || name, ', ')
+            FROM (
+                SELECT name, COUNT(*) AS tube_count
+                FROM tubes
+                WHERE amp_id = a.id
+                GROUP BY name
+                ORDER BY tube_count DESC, name
+            )
+        )
+    FROM amps a
+    WHERE a.id IN (SELECT amp_id FROM amp_summary_dirty)
+    ''')
+
+    conn.execute('''
+    INSERT INTO amp_resistor_groups (amp_id, resistor, wattage, precision, resistor_count)
+    SELECT amp_id, resistor, wattage, precision, COUNT(id)
+    FROM resistors
+    WHERE amp_id IN (SELECT amp_id FROM amp_summary_dirty)
+    GROUP BY amp_id, resistor, wattage, precision
+    ''')
+
+    conn.execute('''
+    INSERT INTO amp_capacitor_groups (amp_id, id, capacitance, electrolitic, voltage_rating, cap_count)
+    SELECT amp_id, MIN(id), capacitance, electrolitic, voltage_rating, COUNT(id)
+    FROM capacitors
+    WHERE amp_id IN (SELECT amp_id FROM amp_summary_dirty)
+    GROUP BY amp_id, capacitance, electrolitic, voltage_rating
+    ''')
+
+    conn.execute('DELETE FROM amp_summary_dirty')
+    return dirty
+
+
+def refresh_all(conn: sqlite3.Connection) -> int:
+    """
+    Rebuilds the summaries of every amp, e.g. after part rows were written outside the importer.
+    """
+    conn.execute('INSERT OR IGNORE INTO amp_summary_dirty (amp_id) SELECT id FROM amps')
+    return refresh(conn)
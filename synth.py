@@ -0,0 +1,230 @@
+import argparse
+import csv
+import os
+import random
+from typing import Dict, List, Optional, Sequence
+
+import utilities
+
+# Lookup tables, identical to the ones shipped in parts/
+LOOKUPS: Dict[str, List[str]] = {
+    'bias_types': ['Fixed', 'Cathode', 'Adjustable', 'Self-Biased'],
+    'tube_functionalities': ['Amplifier', 'Rectifier', 'Preamp', 'Driver'],
+    'tube_types': ['Triode', 'Pentode', 'Tetrode', 'Hexode'],
+    'transformer_types': ['Power', 'Output', 'Choke', 'Driver'],
+    'winding_types': ['Primary', 'Secondary'],
+    'core_types': ['Bobbin'],
+}
+LOOKUP_COLUMNS = {'tube_functionalities': 'tube_functionality'}
+
+BRANDS = [
+    'Fender', 'Marshall', 'Mesa Boogie', 'Vox', 'Hiwatt', 'Orange', 'Ampeg', 'Magnatone',
+    'Gibson', 'Supro', 'Dumble', 'Matchless', 'Bogner', 'Soldano', 'Laney', 'Sound City',
+]
+
+# (name, tube type id, functionality id, plate volts, plate mA, dissipation W, bias V)
+TUBES = [
+    ('12AX7', 1, 3, 250.0, 1.2, 1.2, -2.0),
+    ('12AT7', 1, 3, 250.0, 10.0, 2.5, -2.0),
+    ('12AU7', 1, 4, 250.0, 10.5, 2.75, -8.5),
+    ('EF86', 2, 3, 250.0, 3.0, 1.0, -2.0),
+    ('EL84', 2, 1, 300.0, 48.0, 12.0, -7.3),
+    ('6V6GT', 3, 1, 315.0, 34.0, 14.0, -13.0),
+    ('6L6GC', 3, 1, 450.0, 60.0, 30.0, -37.0),
+    ('EL34', 2, 1, 450.0, 70.0, 25.0, -38.0),
+    ('KT88', 3, 1, 560.0, 85.0, 42.0, -52.0),
+    ('5AR4', 1, 2, 450.0, 250.0, 0.0, 0.0),
+    ('5Y3GT', 1, 2, 350.0, 125.0, 0.0, 0.0),
+]
+
+TAPERS = ['A 2-35', 'A 0012', 'RA', 'B', 'C', 'A 2-35, log', 'Linear']
+WATTAGES = [0.25, 0.5, 0.5, 0.5, 1.0, 2.0, 5.0]
+PRECISIONS = ['0.1', '0.1', '0.05', '0.01']
+VOLTAGE_RATINGS = [25, 50, 100, 350, 400, 450, 500, 600]
+
+# Winding voltages as written on schematics; normalize.parse_volts must accept all of them
+PRIMARY_VOLTS = ['120V', '117V', '230V', '120/240V']
+SECONDARY_VOLTS = ['650/550Vct', '700Vct', '6.3Vct', '6.3V', '5V', '350/0/350V', '4.47V', '8V', '16V']
+
+
+class CatalogGenerator:
+    """
+    Writes a reproducible ``parts/`` tree of any size for benchmarks.
+
+    Values follow the distributions real amps have: E12/E24 resistors between
+    10Ω and 2.2MΩ, film caps in the pF-nF range and electrolytics in µF, the
+    usual preamp/power/rectifier tubes, and power/output transformers with
+    several windings. Part ids are unique across the whole tree, as the
+    importer expects. The same seed always produces byte-identical files.
+
+    Example:
+        CatalogGenerator(seed=1, amps=2000).write('/tmp/parts')
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        brands: int = 12,
+        amps: int = 100,
+        resistors: int = 60,
+        capacitors: int = 30,
+        pots: int = 6,
+        tubes: int = 5,
+        transformers: int = 3,
+        windings: int = 4,
+    ):
+        self.seed = seed
+        self.brands = brands
+        self.amps = amps
+        self.per_amp = {
+            'resistors': resistors,
+            'capacitors': capacitors,
+            'pots': pots,
+            'tubes': tubes,
+            'transformers': transformers,
+        }
+        self.windings = windings
+        self._resistor_values = self._series_values(10, 2_200_000)
+
+    @staticmethod
+    def _series_values(low: float, high: float) -> List[int]:
+        values = []
+        decade = 1
+        while decade <= high:
+            values.extend(round(value * decade) for value in utilities.E24)
+            decade *= 10
+        return sorted({value for value in values if low <= value <= high})
+
+    def _rows_per_amp(self, rng: random.Random, table: str) -> int:
+        # +-50% around the configured mean, so amps differ in size
+        mean = self.per_amp[table]
+        return max(0, round(mean * rng.uniform(0.5, 1.5))) if mean else 0
+
+    def write(self, base_url: str) -> Dict[str, int]:
+        """
+        Writes the tree under ``base_url`` and returns the number of rows written per table.
+        """
+        rng = random.Random(self.seed)
+        os.makedirs(base_url, exist_ok=True)
+        counts: Dict[str, int] = {}
+        next_id = {table: 1 for table in ('resistors', 'capacitors', 'pots', 'tubes', 'transformers', 'transformer_windings')}
+
+        for table, values in LOOKUPS.items():
+            column = LOOKUP_COLUMNS.get(table, 'type')
+            self._write(base_url, f'{table}.csv', ['id', column], [(i, v) for i, v in enumerate(values, 1)])
+
+        brand_names = [
+            BRANDS[i] if i < len(BRANDS) else f'{BRANDS[i % len(BRANDS)]} {i // len(BRANDS) + 1}'
+            for i in range(self.brands)
+        ]
+        self._write(base_url, 'brands.csv', ['id', 'brand'], [(i, name) for i, name in enumerate(brand_names, 1)])
+
+        amp_rows = [(i, f'Model {i:05d}', rng.randint(1, self.brands)) for i in range(1, self.amps + 1)]
+        self._write(base_url, 'amps.csv', ['id', 'amp', 'brand_id'], amp_rows)
+        counts['amps'] = len(amp_rows)
+
+        for amp_id, _, _ in amp_rows:
+            amp_dir = os.path.join(base_url, f'amp-{amp_id:05d}')
+            os.makedirs(amp_dir, exist_ok=True)
+            for table, (columns, rows) in self._amp_tables(rng, amp_id, next_id).items():
+                self._write(amp_dir, f'{table}.csv', columns, rows)
+                counts[table] = counts.get(table, 0) + len(rows)
+
+        return counts
+
+    def _amp_tables(self, rng: random.Random, amp_id: int, next_id: Dict[str, int]) -> Dict:
+        def ids(table: str, count: int) -> range:
+            start = next_id[table]
+            next_id[table] += count
+            return range(start, start + count)
+
+        resistors = [
+            (i, rng.choice(self._resistor_values), rng.choice(WATTAGES), rng.choice(PRECISIONS), amp_id)
+            for i in ids('resistors', self._rows_per_amp(rng, 'resistors'))
+        ]
+
+        capacitors = []
+        for i in ids('capacitors', self._rows_per_amp(rng, 'capacitors')):
+            if rng.random() < 0.3:
+                capacitance = rng.choice((1, 2.2, 4.7, 10, 16, 20, 22, 25, 32, 47, 100, 220))
+                capacitors.append((i, capacitance, 1, rng.choice(VOLTAGE_RATINGS), amp_id))
+            else:
+                capacitance = rng.choice(utilities.E12) * 10 ** rng.randint(-5, -1)
+                capacitors.append((i, round(capacitance, 7), 0, rng.choice(VOLTAGE_RATINGS[2:]), amp_id))
+
+        pots = [
+            (i, rng.choice((10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)),
+             0.5, '0.1', rng.choice(TAPERS), amp_id)
+            for i in ids('pots', self._rows_per_amp(rng, 'pots'))
+        ]
+
+        tubes = []
+        for i in ids('tubes', self._rows_per_amp(rng, 'tubes')):
+            name, tube_type, function, plate_voltage, plate_ma, dissipation, bias = rng.choice(TUBES)
+            plate_current = round(plate_ma * rng.uniform(0.8, 1.2), 2)
+            tubes.append((
+                i, name, tube_type, function, plate_voltage, plate_current, round(plate_current * 1.1, 2),
+                0.01, dissipation, bias, 2 if bias == 0 else rng.randint(1, 2), amp_id,
+                f'http://example.com/{name}-datasheet.pdf',
+            ))
+
+        transformers, windings = [], []
+        for i in ids('transformers', self._rows_per_amp(rng, 'transformers')):
+            transformer_type = rng.randint(1, 3)
+            transformers.append((i, f'{rng.randint(100, 999)}{rng.choice("PBCX")}{rng.randint(1, 9)}{rng.choice("ABC")}',
+                                 transformer_type, 1, float(rng.choice((5, 15, 40, 100, 200))), amp_id))
+            winding_ids = ids('transformer_windings', rng.randint(1, self.windings) if self.windings else 0)
+            for winding in winding_ids:
+                primary = winding == winding_ids.start  # one primary, then secondaries
+                volts = rng.choice(PRIMARY_VOLTS if primary else SECONDARY_VOLTS)
+                windings.append((winding, i, 1 if primary else 2, volts, round(rng.uniform(0.05, 5), 2),
+                                 rng.choice((0, 4, 8, 16, 5000))))
+
+        return {
+            'tubes': (['id', 'name', 'tube_type_id', 'tube_functionality_id', 'plate_voltage', 'plate_current',
+                       'cathode_current', 'grid_current', 'dissipation', 'bias', 'bias_type_id', 'amp_id',
+                       'datasheet_url'], tubes),
+            'resistors': (['id', 'resistor', 'wattage', 'precision', 'amp_id'], resistors),
+            'capacitors': (['id', 'capacitance', 'electrolitic', 'voltage_rating', 'amp_id'], capacitors),
+            'pots': (['id', 'resistor', 'wattage', 'precision', 'taper', 'amp_id'], pots),
+            'transformer_windings': (['id', 'transformer_id', 'winding_type_id', 'volts', 'amps', 'impedance'], windings),
+            'transformers': (['id', 'part_number', 'transformer_type_id', 'core_type_id', 'wattage', 'amp_id'], transformers),
+        }
+
+    @staticmethod
+    def _write(directory: str, name: str, columns: Sequence[str], rows: Sequence[Sequence]) -> None:
+        with open(os.path.join(directory, name), 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+
+def generate(base_url: str, seed: int = 0, **sizes) -> Dict[str, int]:
+    """
+    Writes a synthetic ``parts/`` tree; see ``CatalogGenerator`` for the size arguments.
+    """
+    return CatalogGenerator(seed=seed, **sizes).write(base_url)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Write a seeded synthetic parts/ tree.')
+    parser.add_argument('base_url', help='directory to write, e.g. /tmp/parts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--brands', type=int, default=12)
+    parser.add_argument('--amps', type=int, default=100)
+    parser.add_argument('--resistors', type=int, default=60, help='mean resistors per amp')
+    parser.add_argument('--capacitors', type=int, default=30, help='mean capacitors per amp')
+    parser.add_argument('--pots', type=int, default=6, help='mean pots per amp')
+    parser.add_argument('--tubes', type=int, default=5, help='mean tubes per amp')
+    parser.add_argument('--transformers', type=int, default=3, help='mean transformers per amp')
+    parser.add_argument('--windings', type=int, default=4, help='maximum windings per transformer')
+    args = parser.parse_args(argv)
+
+    sizes = vars(args)
+    base_url = sizes.pop('base_url')
+    counts = generate(base_url, **sizes)
+    print(', '.join(f'{count} {table}' for table, count in counts.items()), f'written to {base_url}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import db
+import importer
+
+PARTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'parts')
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    A copy of the repository's parts tree and a database loaded from it.
+    """
+    parts = tmp_path / 'parts'
+    shutil.copytree(PARTS, parts)
+    db_path = str(tmp_path / 'amp_parts.db')
+    importer.import_tree(str(parts), db_path=db_path, workers=1)
+    return parts, db_path
+
+
+def _read(path):
+    with open(path) as file:
+        return file.read().splitlines()
+
+
+def _write(path, lines):
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+def _query(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _resistor_counts(db_path):
+    return dict(_query(db_path, 'SELECT amp_id, resistor_count FROM amp_part_summary'))
+
+
+def test_changed_row_is_upserted_in_place(tree):
+    parts, db_path = tree
+    path = parts / 'vibro-champ' / 'resistors.csv'
+    lines = _read(path)
+    lines[1] = '1,123456,0.5,0.1,2'
+    _write(path, lines)
+
+    importer.import_tree(str(parts), db_path=db_path, workers=1)
+
+    assert _query(db_path, 'SELECT resistor FROM resistors WHERE id = 1') == [(123456,)]
+    assert _query(db_path, 'SELECT COUNT(*) FROM resistors') == [(len(lines) - 1,)]
+
+
+def test_rows_and_files_removed_from_the_tree_are_deleted(tree):
+    parts, db_path = tree
+    path = parts / 'vibro-champ' / 'resistors.csv'
+    lines = _read(path)
+    _write(path, lines[:-1])
+
+    importer.import_tree(str(parts), db_path=db_path, workers=1)
+    assert _query(db_path, 'SELECT COUNT(*) FROM resistors') == [(len(lines) - 2,)]
+    assert _resistor_counts(db_path)[2] == len(lines) - 2
+
+    os.remove(parts / 'vibro-champ' / 'pots.csv')
+    importer.import_tree(str(parts), db_path=db_path, workers=1)
+    assert _query(db_path, 'SELECT COUNT(*) FROM pots') == [(0,)]
+    assert _query(db_path, "SELECT COUNT(*) FROM import_manifest WHERE path LIKE '%pots.csv'") == [(0,)]
+
+
+def test_row_moved_to_another_file_keeps_its_id(tree):
+    parts, db_path = tree
+    source = parts / 'vibro-champ' / 'resistors.csv'
+    lines = _read(source)
+    moved = lines.pop(1)
+    _write(source, lines)
+    os.makedirs(parts / 'champ')
+    _write(parts / 'champ' / 'resistors.csv', [lines[0], moved.rsplit(',', 1)[0] + ',1'])
+
+    importer.import_tree(str(parts), db_path=db_path, workers=1)
+
+    row_id = int(moved.split(',')[0])
+    assert _query(db_path, 'SELECT amp_id FROM resistors WHERE id = ?', (row_id,)) == [(1,)]
+    assert _query(db_path, 'SELECT COUNT(*) FROM resistors') == [(len(lines),)]
+    counts = _resistor_counts(db_path)
+    assert (counts[1], counts[2]) == (1, len(lines) - 1)
+
+
+def test_id_claimed_by_two_files_is_refused(tree):
+    parts, db_path = tree
+    lines = _read(parts / 'vibro-champ' / 'resistors.csv')
+    os.makedirs(parts / 'champ')
+    # The vibro-champ file is unchanged: the clash must be found from the new file alone
+    _write(parts / 'champ' / 'resistors.csv', [lines[0], lines[1].rsplit(',', 1)[0] + ',1'])
+
+    with pytest.raises(sqlite3.IntegrityError, match='unique across the parts tree'):
+        importer.import_tree(str(parts), db_path=db_path, workers=1)
+
+    assert _query(db_path, 'SELECT COUNT(*) FROM resistors') == [(len(lines) - 1,)]
+    assert _query(db_path, 'SELECT DISTINCT amp_id FROM resistors') == [(2,)]
+    assert _query(db_path, "SELECT COUNT(*) FROM import_manifest WHERE path LIKE 'champ%'") == [(0,)]
+
+
+def test_unchanged_tree_is_a_no_op(tree):
+    parts, db_path = tree
+    before = _query(db_path, 'SELECT path, sha256, imported_at FROM import_manifest ORDER BY path')
+
+    stats = importer.import_tree(str(parts), db_path=db_path, workers=1)
+
+    assert stats['rows'] == 0
+    assert _query(db_path, 'SELECT path, sha256, imported_at FROM import_manifest ORDER BY path') == before
+    assert _query(db_path, 'PRAGMA user_version') == [(db.SCHEMA_VERSION,)]
@@ -1,3 +1,30 @@
+import csv
+import functools
+import io
+import itertools
+import sys
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Entries kept by each convert_* memo; part values cluster on a few thousand standard values
+FORMAT_CACHE_SIZE = 8192
+
+# Standard EIA preferred-number series, one decade
+E12 = (1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2)
+E24 = (
+    1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+    3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1,
+)
+E96 = (
+    1.00, 1.02, 1.05, 1.07, 1.10, 1.13, 1.15, 1.18, 1.21, 1.24, 1.27, 1.30,
+    1.33, 1.37, 1.40, 1.43, 1.47, 1.50, 1.54, 1.58, 1.62, 1.65, 1.69, 1.74,
+    1.78, 1.82, 1.87, 1.91, 1.96, 2.00, 2.05, 2.10, 2.15, 2.21, 2.26, 2.32,
+    2.37, 2.43, 2.49, 2.55, 2.61, 2.67, 2.74, 2.80, 2.87, 2.94, 3.01, 3.09,
+    3.16, 3.24, 3.32, 3.40, 3.48, 3.57, 3.65, 3.74, 3.83, 3.92, 4.02, 4.12,
+    4.22, 4.32, 4.42, 4.53, 4.64, 4.75, 4.87, 4.99, 5.11, 5.23, 5.36, 5.49,
+    5.62, 5.76, 5.90, 6.04, 6.19, 6.34, 6.49, 6.65, 6.81, 6.98, 7.15, 7.32,
+    7.50, 7.68, 7.87, 8.06, 8.25, 8.45, 8.66, 8.87, 9.09, 9.31, 9.53, 9.76,
+)
+
 def trim_trailing_zeros(value: str) -> str:
     """
     Trims trailing zeros and unnecessary decimal points from a string representation of a number.
@@ -12,6 +39,7 @@ def trim_trailing_zeros(value: str) -> str:
         value = value.rstrip('0').rstrip('.')
     return value
 
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE, typed=True)
 def convert_resistor_value(value: int) -> str:
     """
     Converts resistor integer values into metric notation and trims trailing zeros.
@@ -29,6 +57,7 @@ def convert_resistor_value(value: int) -> str:
     else:
         return f"{value}Ω"
 
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE, typed=True)
 def convert_capacitor_value(value: float) -> str:
     """
     Converts capacitor values from microfarads to metric notation and trims trailing zeros.
@@ -50,6 +79,7 @@ def convert_capacitor_value(value: float) -> str:
     else:
         return trim_trailing_zeros(f"{value * 1_000_000:.2f}") + "pF"  # Picofarads
 
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE, typed=True)
 def convert_current_value(value: float) -> str:
     """
     Converts capacitor values from microfarads to metric notation and trims trailing zeros.
@@ -73,20 +103,128 @@ def convert_current_value(value: float) -> str:
         return f"{value * 1:.2f}A"
 
 def to_csv(arr):
-    output = []
+    """
+    Formats a list of dicts as CSV lines, header first.
+
+    Values are quoted by ``csv.writer`` where needed, so a taper such as
+    'A 2-35, log' stays one column. For large results stream with ``export`` instead.
 
+    Args:
+        arr (list): Rows sharing the same keys.
+
+    Returns:
+        list: One CSV line per row, without line terminators.
+    """
     if not arr:
         return []
 
-    # Load headers
-    headers = ','.join(arr[0].keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='')
+    output = []
+
+    for values in itertools.chain([arr[0].keys()], (row.values() for row in arr)):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        output.append(buffer.getvalue())
+
+    return output
 
-    output.append(headers)
+_tables: Dict[str, Dict] = {}
 
-    for row in arr:
-        output.append(','.join([
-            str(v)
-            for v in row.values()
-        ]))
 
-    return output
\ No newline at end of file
+def _e_series_mantissas() -> List[int]:
+    # Series values scaled by 100 so decades can be built with exact integer/decimal math
+    return sorted({round(value * 100) for value in E12 + E24 + E96})
+
+
+def _e_series_tables() -> Dict[str, Dict]:
+    """
+    Builds, once, the formatted strings of every E12/E24/E96 value: 1Ω-99MΩ resistors
+    and 1pF-9.9mF capacitors (stored in microfarads).
+    """
+    if not _tables:
+        mantissas = _e_series_mantissas()
+
+        resistors = {}
+        for exponent in range(8):
+            for mantissa in mantissas:
+                scaled = mantissa * 10 ** exponent
+                if scaled % 100 == 0:
+                    resistors[scaled // 100] = convert_resistor_value.__wrapped__(scaled // 100)
+
+        capacitors = {}
+        for exponent in range(-6, 4):
+            for mantissa in mantissas:
+                value = float(f'{mantissa}e{exponent - 2}')
+                capacitors[value] = convert_capacitor_value.__wrapped__(value)
+
+        _tables['resistor'] = resistors
+        _tables['capacitor'] = capacitors
+    return _tables
+
+
+def _format_batch(
+    values: Iterable,
+    convert: Callable,
+    table: Dict,
+    key_type: Optional[type] = None,
+) -> List[str]:
+    # NumPy is optional and never imported here: an ndarray means it is already loaded
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(values, np.ndarray):
+        # Format each distinct value once, then scatter the strings back
+        uniques, inverse = np.unique(values, return_inverse=True)
+        formatted = _format_batch(uniques.tolist(), convert, table, key_type)
+        return [formatted[i] for i in inverse.tolist()]
+
+    lookup = table.get
+    output = []
+    append = output.append
+    for value in values:
+        formatted = lookup(value) if key_type is None or type(value) is key_type else None
+        append(formatted if formatted is not None else convert(value))
+    return output
+
+
+def format_resistor_values(values: Iterable[int]) -> List[str]:
+    """
+    Formats a whole column of resistor values, same output as convert_resistor_value.
+
+    Standard E-series values come from a precomputed table and everything else
+    from the convert_resistor_value memo. NumPy arrays are deduplicated first.
+
+    Args:
+        values (iterable): Resistor values in ohms (list, tuple, generator or NumPy array).
+
+    Returns:
+        list: The formatted values, in input order.
+    """
+    # Only ints hit the table: convert_resistor_value(470.0) is '470.0Ω', not '470Ω'
+    return _format_batch(values, convert_resistor_value, _e_series_tables()['resistor'], int)
+
+
+def format_capacitor_values(values: Iterable[float]) -> List[str]:
+    """
+    Formats a whole column of capacitor values, same output as convert_capacitor_value.
+
+    Args:
+        values (iterable): Capacitor values in microfarads (list, tuple, generator or NumPy array).
+
+    Returns:
+        list: The formatted values, in input order.
+    """
+    return _format_batch(values, convert_capacitor_value, _e_series_tables()['capacitor'])
+
+
+def format_current_values(values: Iterable[float]) -> List[str]:
+    """
+    Formats a whole column of current values, same output as convert_current_value.
+
+    Args:
+        values (iterable): Current values (list, tuple, generator or NumPy array).
+
+    Returns:
+        list: The formatted values, in input order.
+    """
+    return _format_batch(values, convert_current_value, {})